@@ -0,0 +1,49 @@
+"""测量 convert_conjugate 与 convert_nonjishokei 每次调用的耗时和临时内存分配
+
+用法：python -m benchmarks.bench_convert_conjugate
+"""
+
+import time
+import tracemalloc
+
+from src.pynonjishokei.main import clear_cache
+from src.pynonjishokei.main import configure_cache
+from src.pynonjishokei.main import convert_conjugate
+from src.pynonjishokei.main import convert_nonjishokei
+
+INPUT_TEXTS = ["食べ", "書か", "泳い", "指さ", "立っ", "死ん", "飛べ", "読ま", "帰り", "高く"]
+
+
+def measure(function, repeat: int = 2000) -> tuple[float, float]:
+    """返回平均每次调用的耗时（微秒）和临时分配的内存（字节）"""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for input_text in INPUT_TEXTS:
+            function(input_text)
+    elapsed = (time.perf_counter() - start_time) / (repeat * len(INPUT_TEXTS))
+
+    # 峰值减去调用结束后仍被返回结果占用的内存，即调用过程中临时分配又释放的内存
+    temporary_total = 0
+    tracemalloc.start()
+    for input_text in INPUT_TEXTS:
+        tracemalloc.reset_peak()
+        result = function(input_text)
+        current, peak = tracemalloc.get_traced_memory()
+        temporary_total += peak - current
+        del result
+    tracemalloc.stop()
+    return elapsed * 1_000_000, temporary_total / len(INPUT_TEXTS)
+
+
+def main():
+    # 关闭结果缓存，测量的是推导本身
+    configure_cache(0)
+    clear_cache()
+    for function in (convert_conjugate, convert_nonjishokei):
+        elapsed, peak = measure(function)
+        print(f"{function.__name__}: {elapsed:.2f}us/call {peak:.0f}B/call temporary")
+    configure_cache(4096)
+
+
+if __name__ == "__main__":
+    main()
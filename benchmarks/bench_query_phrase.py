@@ -0,0 +1,84 @@
+"""对比有无索引时 query_phrase 在大规模词组数据库中的查询延迟
+
+用法：python -m benchmarks.bench_query_phrase [词组数量]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from src.pynonjishokei.db.build_db import build_db
+from src.pynonjishokei.db.query_phrase import build_phrase_query
+
+HIRAGANA = [chr(code) for code in range(ord("ぁ"), ord("ゖ") + 1)]
+KANJI = [chr(code) for code in range(ord("一"), ord("一") + 2000)]
+
+
+def generate_phrases(phrase_count: int, seed: int = 0) -> list[tuple]:
+    """生成虚构的词组数据
+
+    Args:
+        phrase_count: 词组数量
+        seed: 随机数种子，保证每次生成的数据相同
+
+    Returns:
+        按 (dict_index, kannji01, kannji02, yomi01, yomi02) 顺序排列的词组数据
+    """
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(phrase_count):
+        kannji01 = "".join(rng.choices(KANJI, k=2))
+        kannji02 = rng.choice(KANJI) + rng.choice("くすつぬむるう")
+        yomi01 = "".join(rng.choices(HIRAGANA, k=3))
+        yomi02 = "".join(rng.choices(HIRAGANA, k=2))
+        rows.append((f"{kannji01}を{kannji02}", kannji01, kannji02, yomi01, yomi02))
+    return rows
+
+
+def generate_queries(rows: list[tuple], query_count: int, seed: int = 0) -> list:
+    """按 longest_matching_scan 的输出格式生成查询，覆盖假名和汉字的各种组合"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(query_count):
+        _, kannji01, kannji02, yomi01, yomi02 = rng.choice(rows)
+        queries.append(
+            [
+                rng.choice([[yomi01], [kannji01], [yomi01, kannji01]]),
+                rng.choice([[yomi02], [kannji02], [yomi02, kannji02]]),
+            ]
+        )
+    return queries
+
+
+def time_queries(db_path: str, queries: list) -> float:
+    """返回平均每次查询的耗时（微秒）"""
+    conn = sqlite3.connect(db_path)
+    try:
+        start_time = time.perf_counter()
+        for phrase_word_list in queries:
+            conn.execute(*build_phrase_query(phrase_word_list)).fetchall()
+        end_time = time.perf_counter()
+    finally:
+        conn.close()
+    return (end_time - start_time) / len(queries) * 1_000_000
+
+
+def main():
+    phrase_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = generate_phrases(phrase_count)
+    queries = generate_queries(rows, 200)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for create_index in (False, True):
+            db_path = os.path.join(temp_dir, f"phrases_{create_index}.db")
+            build_db(rows, db_path, create_index=create_index)
+            print(
+                f"phrases={phrase_count} index={create_index} "
+                f"latency={time_queries(db_path, queries):.1f}us/query"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""测量所有热点路径的耗时，输出 JSON，并可与基线结果对比以发现性能退化
+
+用法：
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --compare baseline.json [--threshold 0.2]
+
+对比模式下，任一项比基线慢超过 threshold（默认 20%）时以状态码 1 退出
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.pynonjishokei.db.query_phrase import query_phrase
+from src.pynonjishokei.main import clear_cache
+from src.pynonjishokei.main import configure_cache
+from src.pynonjishokei.main import convert_conjugate
+from src.pynonjishokei.main import convert_nonjishokei
+from src.pynonjishokei.main import scan_input_string
+from src.pynonjishokei.preprocess import convert_kata_to_hira
+from src.pynonjishokei.preprocess import preprocess
+from src.pynonjishokei.scan_for_phrase import longest_matching_scan
+
+# 接近真实使用场景的语料：用户在阅读时选中的句子
+SENTENCES = [
+    "今日は、寿司を食べに銀座に行きます。",
+    "嘘をつくのはよくないと思わなかったのか。",
+    "昨日は雨が降っていたので、家で本を読んでいました。",
+    "彼女はアツいコーヒーを飲みながら、窓の外を眺めていた。",
+    "コンピュータの使い方を教えてもらえませんか。",
+    "早く帰らなければならないので、先に失礼します。",
+    "子供たちに野菜を食べさせられなかったことを後悔している。",
+    "その問題は思ったより難しくなかった。",
+    "明日までにレポートを書き終えておかないといけない。",
+    "桜が咲き始めたら、みんなで花見に行こう。",
+    "彼は約束を守らずに、どこかへ行ってしまった。",
+    "障がいのある人にも使いやすいデザインを心がけています。",
+    "何度も説明したのに、まだ分かってもらえない。",
+    "こんなに高かったら、誰も買わないでしょう。",
+    "駅で待ち合わせをしていたが、彼は来なかった。",
+    "日本語を勉強し続ければ、いつか上手に話せるようになる。",
+]
+# 常见的用言活用形，用于单个单词的测试
+WORDS = [
+    "食べました",
+    "行った",
+    "書かない",
+    "泳いで",
+    "読まれる",
+    "高かった",
+    "アツく",
+    "コンピュータ",
+    "障がい",
+    "飛べば",
+    "死んだ",
+    "帰ろう",
+    "しなかった",
+    "来られる",
+    "食べさせられなかった",
+    "高そう",
+]
+HIRAGANA = [chr(code) for code in range(ord("ぁ"), ord("ゖ") + 1)]
+KATAKANA = [chr(code) for code in range(ord("ァ"), ord("ヶ") + 1)]
+KANJI = list("日本語食行書読高来見言思話使帰飲待知持立出入")
+SCAN_LENGTHS = (1, 4, 16, 64)
+
+
+def generate_text(length: int, seed: int) -> str:
+    """生成固定的合成语料：汉字、平假名、片假名和标点混合的字符串"""
+    rng = random.Random(seed)
+    pools = [KANJI, HIRAGANA, HIRAGANA, KATAKANA, ["。", "、", "（", "）"]]
+    return "".join(rng.choice(rng.choice(pools)) for _ in range(length))
+
+
+def synthetic_texts(length: int, count: int = 16) -> List[str]:
+    return [generate_text(length, seed) for seed in range(count)]
+
+
+def measure(
+    function: Callable[[str], object], inputs: List[str], repeat: int
+) -> Dict[str, float]:
+    """返回平均每次调用耗时（微秒）在多轮测量中的最小值和中位数"""
+    # 每轮至少运行约 20 毫秒，减少计时器精度的影响
+    start_time = time.perf_counter()
+    for input_text in inputs:
+        function(input_text)
+    once = max(time.perf_counter() - start_time, 1e-6)
+    number = max(1, int(0.02 / once))
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(number):
+            for input_text in inputs:
+                function(input_text)
+        elapsed = time.perf_counter() - start_time
+        timings.append(elapsed / (number * len(inputs)) * 1_000_000)
+    return {"min_us": min(timings), "median_us": statistics.median(timings)}
+
+
+def measure_subprocess(code: str, repeat: int) -> Dict[str, float]:
+    """在新的解释器中运行 code，code 负责打印以微秒为单位的耗时"""
+    timings = [
+        float(subprocess.check_output([sys.executable, "-c", code], text=True))
+        for _ in range(repeat)
+    ]
+    return {"min_us": min(timings), "median_us": statistics.median(timings)}
+
+
+def measure_import(repeat: int) -> Dict[str, float]:
+    """在新的解释器中测量导入 main.py 的耗时，规则文件在第一次查询时才加载，不计入"""
+    code = (
+        "import time;start_time=time.perf_counter();"
+        "import src.pynonjishokei.main;"
+        "print((time.perf_counter()-start_time)*1e6)"
+    )
+    return measure_subprocess(code, repeat)
+
+
+def measure_first_lookup(repeat: int) -> Dict[str, float]:
+    """在新的解释器中测量导入之后第一次查询的耗时，包括加载规则文件"""
+    code = (
+        "import src.pynonjishokei.main as main;"
+        "import time;start_time=time.perf_counter();"
+        "main.scan_input_string('食べた');"
+        "print((time.perf_counter()-start_time)*1e6)"
+    )
+    return measure_subprocess(code, repeat)
+
+
+def build_benchmarks() -> Dict[str, Callable[[int], Dict[str, float]]]:
+    """返回所有测试项，键为测试项名称，值接收测量轮数并返回测量结果"""
+    phrase_queries = [[["うそ", "嘘"], ["つく", "付く"]], [["き"], ["つける"]]]
+    benchmarks: Dict[str, Callable[[int], Dict[str, float]]] = {
+        "import": measure_import,
+        "first_lookup": measure_first_lookup,
+        "preprocess": lambda repeat: measure(preprocess, SENTENCES, repeat),
+        "convert_kata_to_hira": lambda repeat: measure(
+            convert_kata_to_hira, SENTENCES, repeat
+        ),
+        "convert_conjugate": lambda repeat: measure(convert_conjugate, WORDS, repeat),
+        "convert_nonjishokei": lambda repeat: measure(
+            convert_nonjishokei, WORDS, repeat
+        ),
+        "scan_input_string/words": lambda repeat: measure(
+            scan_input_string, WORDS, repeat
+        ),
+        "scan_input_string/sentences": lambda repeat: measure(
+            scan_input_string, SENTENCES, repeat
+        ),
+    }
+    for length in SCAN_LENGTHS:
+        inputs = synthetic_texts(length)
+        benchmarks[f"scan_input_string/synthetic_{length}"] = (
+            lambda repeat, inputs=inputs: measure(scan_input_string, inputs, repeat)
+        )
+    benchmarks["longest_matching_scan"] = lambda repeat: measure(
+        longest_matching_scan, SENTENCES, repeat
+    )
+    benchmarks["query_phrase"] = lambda repeat: measure(
+        query_phrase, phrase_queries, repeat
+    )
+    return benchmarks
+
+
+def run(repeat: int, selected: Optional[List[str]] = None) -> dict:
+    """运行测试项，返回可以保存为 JSON 的结果"""
+    # 关闭结果缓存，测量的是推导本身而不是缓存命中
+    configure_cache(0)
+    clear_cache()
+    results = {}
+    try:
+        for name, benchmark in build_benchmarks().items():
+            if selected and not any(name.startswith(prefix) for prefix in selected):
+                continue
+            results[name] = benchmark(repeat)
+            print(f"{name}: {results[name]['min_us']:.2f}us", file=sys.stderr)
+    finally:
+        configure_cache(4096)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """对比基线结果，返回比基线慢超过 threshold 的测试项"""
+    regressions = []
+    for name, result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            continue
+        ratio = result["min_us"] / baseline_result["min_us"]
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(
+            f"{name}: {baseline_result['min_us']:.2f}us -> "
+            f"{result['min_us']:.2f}us ({ratio:.2f}x) {status}",
+            file=sys.stderr,
+        )
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as a regression, 0.2 means 20%%",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark")
+    parser.add_argument(
+        "benchmarks", nargs="*", help="only run benchmarks starting with these names"
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.repeat, args.benchmarks)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(current, ensure_ascii=False, indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""A japanese morphological analyzer designed for dictionary retrieval.
+
+对外接口：导入本包时不导入任何子模块，第一次访问下列名称时才导入对应的子模块，
+规则文件则在第一次查询时才加载
+
+    import pynonjishokei
+
+    pynonjishokei.scan_input_string("食べた")
+    pynonjishokei.scan_for_phrase.scan_for_phrase("嘘をつくのよ")
+    pynonjishokei.preprocess.convert_kata_to_hira("タベル")
+"""
+
+import importlib
+
+# 名称 -> 定义它的子模块
+_ATTRIBUTE_MODULES = {
+    "scan_input_string": "main",
+    "scan_many": "main",
+    "convert_nonjishokei": "main",
+    "convert_orthography": "main",
+    "convert_conjugate": "main",
+    "reload_rules": "main",
+    "rule_registry": "main",
+    "cache_info": "main",
+    "clear_cache": "main",
+    "configure_cache": "main",
+    "longest_matching_scan": "scan_for_phrase",
+    "convert_kata_to_hira": "preprocess",
+    "convert_hira_to_kata": "preprocess",
+    "build_lattice": "lattice",
+    "best_path": "lattice",
+    "iter_surface_forms": "generation",
+}
+# 作为子模块本身公开的名称，与子模块同名的函数只能通过子模块访问，
+# 否则导入子模块时包的属性会被替换
+_SUBMODULES = (
+    "main",
+    "preprocess",
+    "rules",
+    "lattice",
+    "generation",
+    "scan_for_phrase",
+    "server",
+)
+
+__all__ = [*_ATTRIBUTE_MODULES, *_SUBMODULES]
+
+
+def __getattr__(name: str):
+    module_name = _ATTRIBUTE_MODULES.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # 之后直接从模块字典中读取，不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
+
@@ -0,0 +1,116 @@
+"""Command line entry of pynonjishokei.
+
+用法：python -m pynonjishokei serve [--host HOST] [--port PORT] [--user-rules PATH]
+      python -m pynonjishokei corpus INPUT OUTPUT [--workers N] [--chunk-size N]
+      python -m pynonjishokei evaluate GOLD [--workers N] [--review REVIEW]
+"""
+
+import argparse
+import json
+from typing import List, Optional
+
+from . import corpus
+from . import evaluate
+from . import server
+from .main import reload_rules
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the parser of the command line arguments.
+    构建命令行参数解析器
+    """
+    parser = argparse.ArgumentParser(prog="pynonjishokei")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve lookups over HTTP from one warm process"
+    )
+    serve_parser.add_argument("--host", default=server.DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=server.DEFAULT_PORT)
+    serve_parser.add_argument(
+        "--unix-socket", help="listen on this Unix socket path instead of TCP"
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=server.DEFAULT_WORKERS,
+        help="number of threads running the lookups",
+    )
+    serve_parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=server.DEFAULT_MAX_PENDING,
+        help="lookups queued or running before new ones are answered with 503",
+    )
+
+    corpus_parser = subparsers.add_parser(
+        "corpus", help="scan every line of a file on a process pool"
+    )
+    corpus_parser.add_argument("input", help="the corpus, one string per line")
+    corpus_parser.add_argument("output", help="where the results are saved")
+    corpus_parser.add_argument(
+        "--workers", type=int, help="number of processes, defaults to every CPU"
+    )
+    corpus_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=corpus.DEFAULT_CHUNK_SIZE,
+        help="number of lines sent to a worker at once",
+    )
+    corpus_parser.add_argument(
+        "--separator", help="only scan the part of a line before the first separator"
+    )
+
+    evaluate_parser = subparsers.add_parser(
+        "evaluate", help="measure accuracy against a nonjishokei:jishokei gold file"
+    )
+    evaluate_parser.add_argument("gold", help="one nonjishokei:jishokei per line")
+    evaluate_parser.add_argument(
+        "--workers", type=int, help="number of processes, defaults to every CPU"
+    )
+    evaluate_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=corpus.DEFAULT_CHUNK_SIZE,
+        help="number of lines sent to a worker at once",
+    )
+    evaluate_parser.add_argument(
+        "--recall-at",
+        type=int,
+        nargs="+",
+        default=list(evaluate.DEFAULT_RECALL_AT),
+        help="values of k reported as recall@k",
+    )
+    evaluate_parser.add_argument("--review", help="write every wrong line to this file")
+    for subparser in (serve_parser, corpus_parser, evaluate_parser):
+        subparser.add_argument(
+            "--user-rules",
+            action="append",
+            default=[],
+            metavar="PATH",
+            help="user rule file merged into the shipped rules, can be repeated",
+        )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.user_rules:
+        reload_rules(user_rule_paths=args.user_rules)
+    if args.command == "serve":
+        server.serve(
+            args.host, args.port, args.unix_socket, args.workers, args.max_pending
+        )
+    elif args.command == "corpus":
+        corpus.process_corpus_file(
+            args.input, args.output, args.workers, args.chunk_size, args.separator
+        )
+    elif args.command == "evaluate":
+        report = evaluate.evaluate_file(
+            args.gold, args.workers, args.chunk_size, args.recall_at, args.review
+        )
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,113 @@
+"""Bounded LRU cache for deinflection results."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+# 表示缓存中没有这个键
+_MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a LRUCache.
+    缓存的命中、未命中和淘汰次数
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache:
+    """A thread-safe, size-bounded least-recently-used cache.
+    线程安全的 LRU 缓存，maxsize 为 0 时不缓存任何结果
+
+    Values should be immutable (e.g. tuples) so that callers cannot corrupt
+    the cached results.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Look up a key and mark it as recently used.
+            查询缓存，未命中时返回 None
+
+        Args:
+            key: The key to look up.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        with self._lock:
+            # 未命中时不抛出 KeyError，避免每次未命中都分配异常对象
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full.
+            写入缓存，超出容量时淘汰最久未使用的结果
+
+        Args:
+            key: The key to store.
+            value: The immutable value to store.
+        """
+        with self._lock:
+            if self._maxsize <= 0:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        """Change the maximum number of entries.
+            修改缓存容量
+
+        Args:
+            maxsize: The new maximum size, 0 disables the cache.
+        """
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics.
+        清空缓存并重置统计数据
+        """
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Report the statistics of the cache.
+            返回缓存的统计数据
+
+        Returns:
+            The hits, misses, evictions, maximum size and current size.
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self._maxsize,
+                len(self._data),
+            )
@@ -0,0 +1,196 @@
+"""Scan a whole corpus on a process pool.
+
+用法：python -m pynonjishokei corpus INPUT OUTPUT [--workers N] [--chunk-size N] [--separator :]
+
+The input is streamed in chunks, every chunk is scanned by one worker
+process, and the results are written in input order. Workers memory-map
+the same compiled rule/index.bin, so the index is shared through the page
+cache instead of being copied into every process. Every worker loads the
+rule files the calling process uses, including user rules, whatever the
+start method of the pool.
+"""
+
+import functools
+import multiprocessing
+import os
+from collections import deque
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from .main import reload_rules
+from .main import rule_registry
+from .main import scan_many
+
+DEFAULT_CHUNK_SIZE = 1000
+
+_Item = TypeVar("_Item")
+_Result = TypeVar("_Result")
+
+
+def iter_chunks(items: Iterable[_Item], chunk_size: int) -> Iterator[List[_Item]]:
+    """Split an iterable into lists of at most chunk_size items.
+        将输入按 chunk_size 切分为多个列表，不会一次性读入全部输入
+
+    Args:
+        items: The items to split, e.g. the lines of a file.
+        chunk_size: The maximum number of items of a chunk.
+
+    Yields:
+        The chunks, in input order.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def init_worker(rule_paths: Dict[str, Any]) -> None:
+    """Load the rules of the calling process in a worker process.
+        在工作进程中加载与主进程相同的规则
+
+    With the spawn and forkserver start methods a worker imports the package
+    anew and would otherwise use the shipped rules only.
+
+    Args:
+        rule_paths: The paths of the calling process, see RuleRegistry.paths.
+    """
+    # fork 启动的进程继承了主进程的规则，无需重新加载
+    if rule_registry.paths != rule_paths:
+        reload_rules(**rule_paths)
+
+
+def imap_chunks(
+    function: Callable[[List[_Item]], _Result],
+    chunks: Iterable[List[_Item]],
+    workers: Optional[int] = None,
+    context: Optional[multiprocessing.context.BaseContext] = None,
+) -> Iterator[Tuple[List[_Item], _Result]]:
+    """Apply a function to every chunk on a process pool, keeping input order.
+        在进程池中处理每个分块，并按输入顺序返回结果
+
+    Unlike Pool.imap, at most two chunks per worker are read ahead, so the
+    memory used does not grow with the size of the input.
+
+    Args:
+        function: A picklable function applied to every chunk.
+        chunks: The chunks to process.
+        workers: The number of processes, None uses every CPU and 1 runs in
+            the calling process.
+        context: The multiprocessing context of the pool, None uses the
+            default start method.
+
+    Yields:
+        Every chunk together with its result, in input order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, function(chunk)
+        return
+    max_pending = workers * 2
+    if context is None:
+        context = multiprocessing.get_context()
+    with context.Pool(workers, init_worker, (rule_registry.paths,)) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.apply_async(function, (chunk,))))
+            if len(pending) >= max_pending:
+                done_chunk, async_result = pending.popleft()
+                yield done_chunk, async_result.get()
+        while pending:
+            done_chunk, async_result = pending.popleft()
+            yield done_chunk, async_result.get()
+
+
+def scan_lines(lines: List[str], separator: Optional[str] = None) -> List[list]:
+    """Scan the text of every line, the worker function of the corpus runner.
+        扫描每一行中的字符串，由工作进程调用
+
+    Args:
+        lines: The lines of one chunk, without line breaks.
+        separator: When given, only the part of a line before the first
+            separator is scanned, e.g. ":" for "食べた:食べる".
+
+    Returns:
+        The results of scan_input_string of every line.
+    """
+    if separator is not None:
+        lines = [line.partition(separator)[0] for line in lines]
+    return list(scan_many(lines))
+
+
+def scan_corpus(
+    input_texts: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[list]:
+    """Scan many strings on a process pool.
+        在进程池中批量扫描字符串
+
+    Args:
+        input_texts: The strings to scan.
+        workers: The number of processes, None uses every CPU.
+        chunk_size: The number of strings sent to a worker at once.
+
+    Yields:
+        The result of scan_input_string of every string, in input order.
+    """
+    for _, results in imap_chunks(
+        scan_lines, iter_chunks(input_texts, chunk_size), workers
+    ):
+        yield from results
+
+
+def process_corpus_file(
+    input_path: str,
+    output_path: str,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    separator: Optional[str] = None,
+) -> int:
+    """Scan every line of a file and write the results in input order.
+        逐行扫描文件，按输入顺序写入结果
+
+    Every output line is the comma separated results, a space and the input line.
+
+    Args:
+        input_path: The corpus, one string per line.
+        output_path: Where the results are saved.
+        workers: The number of processes, None uses every CPU.
+        chunk_size: The number of lines sent to a worker at once.
+        separator: Only scan the part of a line before the first separator.
+
+    Returns:
+        The number of processed lines.
+    """
+    line_count = 0
+    with open(input_path, "r", encoding="utf-8") as f, open(
+        output_path, "w", encoding="utf-8"
+    ) as s:
+        lines = (line.rstrip("\r\n") for line in f)
+        for chunk, results in imap_chunks(
+            functools.partial(scan_lines, separator=separator),
+            iter_chunks(lines, chunk_size),
+            workers,
+        ):
+            s.writelines(
+                ",".join(result) + " " + line + "\n"
+                for line, result in zip(chunk, results)
+            )
+            line_count += len(chunk)
+    return line_count
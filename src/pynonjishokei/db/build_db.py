@@ -0,0 +1,92 @@
+"""构建词组数据库 nonjishokei.db
+
+用法：python -m pynonjishokei.db.build_db [nonjishokei.db]
+不传入参数时按照最新的表结构重建包内的数据库
+"""
+
+import os
+import sqlite3
+import sys
+from typing import Iterable
+
+# kannji02 以前被错误地声明为 INTEGER
+CREATE_TABLE_STATEMENT = """CREATE TABLE kannyouku (
+    dict_index TEXT NOT NULL,
+    kannji01 TEXT,
+    kannji02 TEXT,
+    yomi01 TEXT,
+    yomi02 TEXT
+)"""
+
+# query_phrase 生成的查询会分别用假名或汉字匹配助词前后的单词，
+# 所以为这 4 种组合各建一个包含 dict_index 的覆盖索引，查询时无需回表
+CREATE_INDEX_STATEMENTS = [
+    "CREATE INDEX kannyouku_yomi01_yomi02 ON kannyouku (yomi01, yomi02, dict_index)",
+    "CREATE INDEX kannyouku_yomi01_kannji02 ON kannyouku (yomi01, kannji02, dict_index)",
+    "CREATE INDEX kannyouku_kannji01_yomi02 ON kannyouku (kannji01, yomi02, dict_index)",
+    "CREATE INDEX kannyouku_kannji01_kannji02 ON kannyouku "
+    "(kannji01, kannji02, dict_index)",
+]
+
+COLUMNS = ("dict_index", "kannji01", "kannji02", "yomi01", "yomi02")
+
+
+def build_db(rows: Iterable[tuple], db_path: str, create_index: bool = True) -> None:
+    """创建词组数据库，已存在的数据库会被替换
+
+    Args:
+        rows: 按 (dict_index, kannji01, kannji02, yomi01, yomi02) 顺序排列的词组数据
+        db_path: 数据库的保存路径
+        create_index: 是否创建索引，仅用于性能对比
+    """
+    # 先写入临时文件再替换，防止正在运行的进程读到写了一半的数据库
+    temp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.execute(CREATE_TABLE_STATEMENT)
+        conn.executemany(
+            f"INSERT INTO kannyouku ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        if create_index:
+            for statement in CREATE_INDEX_STATEMENTS:
+                conn.execute(statement)
+            conn.execute("ANALYZE")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(temp_path, db_path)
+
+
+def rebuild_db(db_path: str) -> None:
+    """读取已有数据库中的词组，按照最新的表结构和索引重建数据库
+
+    Args:
+        db_path: 需要重建的数据库路径
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM kannyouku").fetchall()
+    finally:
+        conn.close()
+    # 修正被错误地保存为整数的 kannji02
+    rows = [
+        tuple(None if value is None else str(value) for value in row) for row in rows
+    ]
+    build_db(rows, db_path)
+
+
+def main():
+    db_path = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join(os.path.dirname(os.path.abspath(__file__)), "nonjishokei.db")
+    )
+    rebuild_db(db_path)
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
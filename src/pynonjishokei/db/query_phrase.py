@@ -1,6 +1,90 @@
 import os
+import pathlib
 import re
 import sqlite3
+import threading
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nonjishokei.db")
+# 数据库在运行时只读，immutable=1 让 SQLite 跳过文件锁和变更检测
+DB_URI = pathlib.Path(DB_PATH).as_uri() + "?mode=ro&immutable=1"
+# 每个连接缓存的预编译语句数量，query_phrase 生成的 SQL 语句组合有限
+CACHED_STATEMENTS = 64
+
+_local = threading.local()
+_connections_lock = threading.Lock()
+# 线程标识 -> 该线程的连接，用于 close_connections 和关闭已结束线程的连接
+_connections: dict[int, sqlite3.Connection] = {}
+# 每次 close_connections 后递增，使各线程中保存的旧连接失效
+_generation = 0
+
+
+def get_connection() -> sqlite3.Connection:
+    """返回当前线程的只读数据库连接，首次调用时创建
+
+    Returns:
+        当前线程复用的数据库连接
+    """
+    connection = getattr(_local, "connection", None)
+    if connection is None or _local.generation != _generation:
+        # current_thread 会登记非 threading 创建的线程，使其出现在 threading.enumerate 中
+        thread_ident = threading.current_thread().ident
+        # 连接只会在创建它的线程中执行查询，只有 close_connections 和下面的清理会跨线程关闭
+        connection = sqlite3.connect(
+            DB_URI,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        with _connections_lock:
+            # 关闭本线程已失效的旧连接，以及已结束的线程留下的连接，
+            # 否则不断替换线程的服务器和线程池会一直持有数据库句柄；其他线程的连接由各自的线程关闭
+            live_idents = {thread.ident for thread in threading.enumerate()}
+            stale_idents = [
+                ident
+                for ident in _connections
+                if ident == thread_ident or ident not in live_idents
+            ]
+            for ident in stale_idents:
+                _connections.pop(ident).close()
+            _connections[thread_ident] = connection
+        _local.connection = connection
+        _local.generation = _generation
+    return connection
+
+
+def invalidate_connections() -> None:
+    """使所有线程的数据库连接失效，各线程在下一次查询时关闭旧连接并重新建立
+
+    不会关闭其他线程正在使用的连接，用于在运行期间重新加载数据库
+    """
+    global _generation
+    with _connections_lock:
+        _generation += 1
+
+
+def close_connections() -> None:
+    """关闭所有线程的数据库连接，之后的查询会重新建立连接
+
+    其他线程可能正在使用这些连接，只能在没有查询时调用，例如测试和退出前
+    """
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        for connection in _connections.values():
+            connection.close()
+        _connections.clear()
+
+
+def reset_after_fork() -> None:
+    """在 fork 出的子进程中丢弃从父进程继承的连接，但不关闭它们，以免影响父进程"""
+    global _generation, _connections_lock
+    _generation += 1
+    _connections.clear()
+    _connections_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
 
 
 def do_query_phrase(statement: str, params: list[str]) -> list[set[str]]:
@@ -13,13 +97,21 @@ def do_query_phrase(statement: str, params: list[str]) -> list[set[str]]:
     Returns:
         以 [("嘘を付く",)] 的格式返回查询结果
     """
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(current_dir, "nonjishokei.db")
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    phrase = cursor.execute(statement, params).fetchall()
-    conn.close()
-    return phrase
+    return get_connection().execute(statement, params).fetchall()
+
+
+def query_phrase_words() -> frozenset[str]:
+    """查询组成词组的所有单词的假名和汉字写法
+
+    Returns:
+        数据库中 yomi01、yomi02、kannji01 和 kannji02 列的所有值
+    """
+    statement = (
+        "SELECT yomi01 FROM kannyouku UNION SELECT yomi02 FROM kannyouku"
+        " UNION SELECT kannji01 FROM kannyouku UNION SELECT kannji02 FROM kannyouku"
+    )
+    rows = get_connection().execute(statement).fetchall()
+    return frozenset(row[0] for row in rows if row[0])
 
 
 def is_all_kana(text: str) -> bool:
@@ -35,21 +127,15 @@ def is_all_kana(text: str) -> bool:
     return re.match(r"^[\u3040-\u309F\u30A0-\u30FF]+$", text) is not None
 
 
-def query_phrase(phrase_word_list: list[list[str]]) -> list[set[str]]:
-    """通过传入的数据构建动态 SQL 在数据库中查询并返回词组
+def build_phrase_query(phrase_word_list: list[list[str]]) -> tuple[str, list[str]]:
+    """根据组成词组的单词构建动态 SQL
 
     Args:
         phrase_word_list: 组成词组的前后项单词，例：[["うそ", "嘘"], ["つく", "付く"]]
-        即嵌套列表中的第一层列表用于区分组成词组的不同单词，第二层列表用于区分单词的不同写法
-        TODO 注意： 目前只支持类似【嘘を付く】这样【名词+助词+动词】的形式的短语，能否支持其他形式的短语需要在实际的生产环境中进行测试
 
     Returns:
-        以 [("嘘を付く",)] 的格式返回所有可能的词组，如果没有查到词组则返回空列表
+        SQL 语句和对应的参数
     """
-    if len(phrase_word_list) != 2:
-        # TODO 暂时不支持非【名词+助词+动词】形式的短语查询
-        return []
-
     statement = "SELECT dict_index FROM kannyouku WHERE 1=1"
     params = []
     # 【名词+助词+动词】形式的短语中，助词前面的部分
@@ -75,5 +161,24 @@ def query_phrase(phrase_word_list: list[list[str]]) -> list[set[str]]:
             kannji02 = word
             statement += " AND kannji02=?"
             params.append(kannji02)
+    return statement, params
+
+
+def query_phrase(phrase_word_list: list[list[str]]) -> list[set[str]]:
+    """通过传入的数据构建动态 SQL 在数据库中查询并返回词组
+
+    Args:
+        phrase_word_list: 组成词组的前后项单词，例：[["うそ", "嘘"], ["つく", "付く"]]
+        即嵌套列表中的第一层列表用于区分组成词组的不同单词，第二层列表用于区分单词的不同写法
+        TODO 注意： 目前只支持类似【嘘を付く】这样【名词+助词+动词】的形式的短语，能否支持其他形式的短语需要在实际的生产环境中进行测试
+
+    Returns:
+        以 [("嘘を付く",)] 的格式返回所有可能的词组，如果没有查到词组则返回空列表
+    """
+    if len(phrase_word_list) != 2:
+        # TODO 暂时不支持非【名词+助词+动词】形式的短语查询
+        return []
+
+    statement, params = build_phrase_query(phrase_word_list)
     phrases = do_query_phrase(statement, params)
     return phrases
@@ -0,0 +1,197 @@
+"""Deinflection automaton compiled from conjugate_rule.json and special_rule.json.
+
+将活用规则和特殊规则编译为同一棵按词尾倒序构建的前缀树，从字符串末尾向前走一次即可找到所有适用的规则
+
+The automaton only speeds up matching the rules that exist. The shipped
+conjugate_rule.json has one-letter keys only, so a deep inflection such as
+食べさせられなかった is still resolved by main.scan_preprocessed_string
+trying every prefix of the input, and the candidates are the same as
+before the automaton. Multi-letter chains, e.g. from user rules, are
+matched in the same walk, but no chain rules are shipped yet and the
+prefix loop stays until they are.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# 一段动词的连用形和口语中省略了词尾的形容词：在字符串后直接补上る或い
+# 本程序的 input_stem 概念对应的不是一段动词语法意义上的词干
+# 今日は、寿司を**食べ**に銀座に行いきます。
+# TODO 一段动词的词干必定是え段假名，但对于对于見る这样汉字就是词干的动词特殊来说，可能需要通过穷举来解决问题
+EMPTY_SUFFIX_ENDINGS = ("る", "い")
+# 埋点中 EMPTY_SUFFIX_ENDINGS 的推导结果对应的规则名称
+EMPTY_SUFFIX_RULE = "v1"
+
+
+class _Node:
+    """A node of the reverse trie, reached by reading a suffix from its last letter."""
+
+    __slots__ = (
+        "children",
+        "conjugate_endings",
+        "conjugate_tails",
+        "conjugate_tail_rules",
+        "special_outputs",
+    )
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # 匹配到这个词尾时，用于替换词尾的辞书形词尾
+        self.conjugate_endings: Tuple[str, ...] = ()
+        # 走到这个节点为止时，拼接在剩余部分之后的所有推导结果，已去除重复值
+        self.conjugate_tails: Tuple[str, ...] = ()
+        # 每个推导结果对应的规则，即 conjugate_rule.json 中匹配到的键，仅用于埋点
+        self.conjugate_tail_rules: Tuple[str, ...] = ()
+        # 整个字符串与特殊规则的键完全一致时的推导结果
+        self.special_outputs: Optional[Tuple[str, ...]] = None
+
+
+class DeinflectionAutomaton:
+    """Reverse trie of inflection endings.
+    活用词尾的倒序前缀树
+
+    Keys of conjugate_rule.json are inflection endings of any length, e.g.
+    "か" or a chain such as "させられなかった"; each is replaced by the
+    jishokei endings it maps to. Keys of special_rule.json only match the
+    whole string.
+    """
+
+    def __init__(
+        self,
+        conjugate_rule_dict: Dict[str, Iterable[str]],
+        special_rule_dict: Dict[str, Iterable[str]],
+    ):
+        self._root = _Node()
+        self._root.conjugate_endings = EMPTY_SUFFIX_ENDINGS
+        self.max_conjugate_length = 0
+        self.max_special_length = 0
+        for suffix, endings in conjugate_rule_dict.items():
+            node = self._insert(suffix)
+            # 同一词尾在多个规则层中出现时合并推导结果，保留第一次出现的顺序
+            node.conjugate_endings = tuple(
+                dict.fromkeys([*node.conjugate_endings, *endings])
+            )
+            self.max_conjugate_length = max(self.max_conjugate_length, len(suffix))
+        for key, outputs in special_rule_dict.items():
+            node = self._insert(key)
+            node.special_outputs = tuple(
+                dict.fromkeys([*(node.special_outputs or ()), *outputs])
+            )
+            self.max_special_length = max(self.max_special_length, len(key))
+        # special_rule.json 中所有键的前缀，用于判断是否还需要继续扫描
+        self.special_prefix_set: FrozenSet[str] = frozenset(
+            key[:end] for key in special_rule_dict for end in range(1, len(key) + 1)
+        )
+
+        self._compile(self._root, "", [])
+
+    def _compile(
+        self, node: _Node, path: str, matches: List[Tuple[int, Tuple[str, ...]]]
+    ) -> None:
+        """Precomputes the deduplicated candidates of every node.
+
+        A walk that stops at a node of depth d has read the last d letters
+        (path) of the input, so every candidate is input[:-d] followed by a
+        tail that is known when compiling.
+        """
+        if node.conjugate_endings:
+            matches = [*matches, (len(path), node.conjugate_endings)]
+        # 推导结果 -> 产生它的规则，重复的推导结果保留第一个规则
+        tails: Dict[str, str] = {}
+        for depth, endings in matches:
+            rule = path[len(path) - depth :] if depth > 0 else EMPTY_SUFFIX_RULE
+            for ending in endings:
+                tails.setdefault(path[: len(path) - depth] + ending, rule)
+        tails.setdefault(path, "")
+        node.conjugate_tails = tuple(tails)
+        node.conjugate_tail_rules = tuple(tails.values())
+        for letter, child in node.children.items():
+            self._compile(child, letter + path, matches)
+
+    def _insert(self, suffix: str) -> _Node:
+        node = self._root
+        for letter in reversed(suffix):
+            child = node.children.get(letter)
+            if child is None:
+                child = node.children[letter] = _Node()
+            node = child
+        return node
+
+    def _walk(self, input_text: str) -> Tuple[str, _Node]:
+        node = self._root
+        depth = 0
+        max_depth = min(len(input_text), self.max_conjugate_length)
+        while depth < max_depth:
+            child = node.children.get(input_text[-depth - 1])
+            if child is None:
+                break
+            node = child
+            depth += 1
+        return input_text[: len(input_text) - depth], node
+
+    def match_conjugate(self, input_text: str) -> Tuple[str, Tuple[str, ...]]:
+        """Finds the stem and the endings that replace its inflection.
+            从末尾向前走一次，找出词干和所有可以替换的辞书形词尾，不拼接字符串
+
+        Args:
+            input_text: A non-empty string containing the conjugation.
+
+        Returns:
+            The stem and the tails, see convert_conjugate; every candidate is
+            the stem followed by one tail.
+        """
+        input_stem, node = self._walk(input_text)
+        return input_stem, node.conjugate_tails
+
+    def convert_conjugate(self, input_text: str) -> List[str]:
+        """Replaces every matching inflection ending in one backward walk.
+            从末尾向前走一次，用所有匹配的词尾规则还原活用变形
+
+        Args:
+            input_text: A non-empty string containing the conjugation.
+
+        Returns:
+            The candidates of the empty suffix, then of longer and longer
+            endings, and finally the input itself, without duplicates.
+        """
+        input_stem, conjugate_tails = self.match_conjugate(input_text)
+        process_output_list = []
+        for tail in conjugate_tails:
+            process_output_list.append(input_stem + tail)
+        return process_output_list
+
+    def explain_conjugate(self, input_text: str) -> List[Tuple[str, str]]:
+        """Pairs every candidate of convert_conjugate with the rule that produced it.
+            返回每个推导结果及产生它的规则，用于埋点
+
+        Args:
+            input_text: A non-empty string containing the conjugation.
+
+        Returns:
+            (candidate, rule) pairs in the order of convert_conjugate. The rule
+            is the matched key of conjugate_rule.json, EMPTY_SUFFIX_RULE for
+            the endings of EMPTY_SUFFIX_ENDINGS and "" for the input itself.
+        """
+        input_stem, node = self._walk(input_text)
+        return [
+            (input_stem + tail, rule)
+            for tail, rule in zip(node.conjugate_tails, node.conjugate_tail_rules)
+        ]
+
+    def convert_special(self, input_text: str) -> Optional[Tuple[str, ...]]:
+        """Looks up the special rule matching the whole string.
+            查询与整个字符串完全一致的特殊规则
+
+        Args:
+            input_text: A scanned prefix.
+
+        Returns:
+            The jishokei of the special rule, or None if no rule matches.
+        """
+        if len(input_text) > self.max_special_length:
+            return None
+        node = self._root
+        for letter in reversed(input_text):
+            node = node.children.get(letter)
+            if node is None:
+                return None
+        return node.special_outputs
@@ -0,0 +1,225 @@
+"""Streaming accuracy evaluation against a gold file.
+
+用法：python -m pynonjishokei evaluate GOLD [--workers N] [--chunk-size N] [--review REVIEW]
+
+Every line of the gold file is "nonjishokei:jishokei", e.g. "食べた:食べる".
+The results are scanned on the corpus runner and folded into counters as
+they arrive, so memory does not grow with the size of the gold file.
+"""
+
+import functools
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from .corpus import DEFAULT_CHUNK_SIZE
+from .corpus import imap_chunks
+from .corpus import iter_chunks
+from .corpus import scan_lines
+from .preprocess import convert_kata_to_hira
+
+GOLD_SEPARATOR = ":"
+DEFAULT_RECALL_AT = (1, 3, 5, 10)
+# 单独统计的规则数量上限，其余规则合并到 OTHER_RULE 中，使内存不随测试数据增长
+DEFAULT_MAX_RULES = 10000
+OTHER_RULE = "other"
+
+
+def derive_rule(input_text: str, jishokei: str) -> str:
+    """Name the rule that turns the jishokei into the input.
+        用输入和正确答案不同的词尾表示所需的还原规则，例：食べた、食べる -> た→る
+
+    Args:
+        input_text: The nonjishokei.
+        jishokei: The correct jishokei.
+
+    Returns:
+        The differing endings of both strings, joined by an arrow.
+    """
+    # 按平假名比较，避免片假名书写导致词干被当作词尾
+    common_length = len(
+        os.path.commonprefix(
+            [convert_kata_to_hira(input_text), convert_kata_to_hira(jishokei)]
+        )
+    )
+    return f"{input_text[common_length:]}→{jishokei[common_length:]}"
+
+
+class AccuracyEvaluator:
+    """Incremental accuracy, recall@k and rank metrics.
+    逐行累计准确率、recall@k、正确答案的平均排名和各规则的错误数
+
+    Per-rule counters are bounded: once twice max_rules rules are tracked,
+    only the max_rules most frequent ones are kept and the others are folded
+    into OTHER_RULE, so memory stays constant however large the gold file is.
+
+    Args:
+        recall_at: The values of k reported as recall@k.
+        max_rules: The number of rules counted separately.
+    """
+
+    def __init__(
+        self,
+        recall_at: Sequence[int] = DEFAULT_RECALL_AT,
+        max_rules: int = DEFAULT_MAX_RULES,
+    ):
+        self.recall_at = tuple(sorted(recall_at))
+        self.max_rules = max_rules
+        self.total = 0
+        self.correct = 0
+        self.malformed = 0
+        self.rank_total = 0
+        self.candidate_total = 0
+        self.hits_at = Counter()
+        self.rule_total = Counter()
+        self.rule_errors = Counter()
+
+    def add(self, input_text: str, jishokei: str, results: Sequence[str]) -> bool:
+        """Fold the results of one gold line into the metrics.
+            累计一行的推导结果
+
+        Args:
+            input_text: The nonjishokei.
+            jishokei: The correct jishokei.
+            results: The results of scan_input_string in ranked order.
+
+        Returns:
+            Whether the correct jishokei is among the results.
+        """
+        self.total += 1
+        self.candidate_total += len(results)
+        rule = derive_rule(input_text, jishokei)
+        if rule not in self.rule_total and len(self.rule_total) >= 2 * self.max_rules:
+            self._fold_rules()
+        self.rule_total[rule] += 1
+        try:
+            rank = results.index(jishokei) + 1
+        except ValueError:
+            self.rule_errors[rule] += 1
+            return False
+        self.correct += 1
+        self.rank_total += rank
+        for k in self.recall_at:
+            if rank <= k:
+                self.hits_at[k] += 1
+        return True
+
+    def _fold_rules(self) -> None:
+        # 只保留出现次数最多的 max_rules 个规则，其余的合并到 OTHER_RULE 中
+        ranked_rules = [
+            rule for rule, _ in self.rule_total.most_common() if rule != OTHER_RULE
+        ]
+        kept_rules = set(ranked_rules[: self.max_rules])
+        for rule in list(self.rule_total):
+            if rule in kept_rules or rule == OTHER_RULE:
+                continue
+            self.rule_total[OTHER_RULE] += self.rule_total.pop(rule)
+            errors = self.rule_errors.pop(rule, 0)
+            if errors:
+                self.rule_errors[OTHER_RULE] += errors
+
+    def add_line(self, line: str, results: Sequence[str]) -> Optional[bool]:
+        """Fold one "nonjishokei:jishokei" line, counting malformed lines apart.
+            累计一行测试数据，格式错误的行不计入准确率
+
+        Returns:
+            Whether the line is correct, or None if it is malformed.
+        """
+        input_text, separator, jishokei = line.partition(GOLD_SEPARATOR)
+        if separator == "" or jishokei == "":
+            self.malformed += 1
+            return None
+        return self.add(input_text, jishokei, results)
+
+    def report(self, top_rules: int = 20) -> Dict[str, Any]:
+        """Summarize the metrics.
+            汇总评估结果
+
+        Args:
+            top_rules: The number of rules with the most errors to report.
+
+        Returns:
+            The accuracy, recall@k, mean rank and the per-rule error counts.
+        """
+        total = max(self.total, 1)
+        return {
+            "total": self.total,
+            "correct": self.correct,
+            "malformed": self.malformed,
+            "accuracy": self.correct / total,
+            "recall_at": {k: self.hits_at[k] / total for k in self.recall_at},
+            "mean_rank": self.rank_total / self.correct if self.correct else None,
+            "mean_candidates": self.candidate_total / total,
+            "rule_errors": {
+                rule: {"errors": errors, "total": self.rule_total[rule]}
+                for rule, errors in self.rule_errors.most_common(top_rules)
+            },
+        }
+
+
+def evaluate_lines(
+    lines: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    recall_at: Sequence[int] = DEFAULT_RECALL_AT,
+    review_file=None,
+) -> Dict[str, Any]:
+    """Evaluate gold lines in one streaming pass.
+        流式评估测试数据
+
+    Args:
+        lines: The "nonjishokei:jishokei" lines, without line breaks.
+        workers: The number of processes, None uses every CPU.
+        chunk_size: The number of lines sent to a worker at once.
+        recall_at: The values of k reported as recall@k.
+        review_file: When given, every wrong line is written to this file.
+
+    Returns:
+        The report of AccuracyEvaluator, with the elapsed seconds and lines per second.
+    """
+    evaluator = AccuracyEvaluator(recall_at)
+    start_time = time.perf_counter()
+    for chunk, chunk_results in imap_chunks(
+        functools.partial(scan_lines, separator=GOLD_SEPARATOR),
+        iter_chunks(lines, chunk_size),
+        workers,
+    ):
+        for line, results in zip(chunk, chunk_results):
+            if evaluator.add_line(line, results) is False and review_file is not None:
+                review_file.write(f"False {','.join(results)} {line}\n")
+    elapsed = time.perf_counter() - start_time
+    report = evaluator.report()
+    report["seconds"] = elapsed
+    report["lines_per_second"] = (evaluator.total + evaluator.malformed) / max(
+        elapsed, 1e-9
+    )
+    return report
+
+
+def evaluate_file(
+    gold_path: str,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    recall_at: Sequence[int] = DEFAULT_RECALL_AT,
+    review_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Evaluate a gold file in one streaming pass, see evaluate_lines.
+        流式评估测试文件
+
+    Args:
+        gold_path: The gold file, one "nonjishokei:jishokei" per line.
+        workers: The number of processes, None uses every CPU.
+        chunk_size: The number of lines sent to a worker at once.
+        recall_at: The values of k reported as recall@k.
+        review_path: When given, every wrong line is written to this file.
+
+    Returns:
+        The evaluation report.
+    """
+    with open(gold_path, "r", encoding="utf-8") as f:
+        lines = (line.rstrip("\r\n") for line in f)
+        if review_path is None:
+            return evaluate_lines(lines, workers, chunk_size, recall_at)
+        with open(review_path, "w", encoding="utf-8") as review_file:
+            return evaluate_lines(lines, workers, chunk_size, recall_at, review_file)
@@ -0,0 +1,150 @@
+"""Reverse generation: jishokei to the surface forms the rules recognise.
+
+反向生成：由辞书形生成规则能够还原的所有非辞书形，用于扩展搜索关键词
+
+The rules only describe the ending that is replaced, e.g. "た" -> "る", so
+the generated forms are what scan_input_string needs to see at the start of
+a text: 食べる gives 食べた, 食べて, 食べさ, ... Longer forms such as
+食べさせられた start with one of them, so search frontends should match the
+generated forms as prefixes.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# pylint: disable=E0402
+from .deinflection import EMPTY_SUFFIX_ENDINGS  # type: ignore
+from .main import rule_registry  # type: ignore
+from .rules import RuleSnapshot  # type: ignore
+
+
+class SurfaceGenerator:
+    """The conjugate and special rules inverted into compact lookup tables.
+    将活用规则和特殊规则倒置为按辞书形词尾查询的表
+
+    Args:
+        conjugate_rule_dict: The content of conjugate_rule.json, including user rules.
+        special_rule_dict: The content of special_rule.json, including user rules.
+    """
+
+    def __init__(
+        self,
+        conjugate_rule_dict: Dict[str, List[str]],
+        special_rule_dict: Dict[str, List[str]],
+    ):
+        # 辞书形词尾 -> 可以替换成的非辞书形词尾
+        suffix_dict: Dict[str, Dict[str, None]] = {}
+        # 一段动词的连用形和省略了词尾的形容词：去掉辞书形词尾即可
+        for ending in EMPTY_SUFFIX_ENDINGS:
+            suffix_dict.setdefault(ending, {})[""] = None
+        for suffix, endings in conjugate_rule_dict.items():
+            for ending in endings:
+                suffix_dict.setdefault(ending, {})[suffix] = None
+        self._suffix_dict: Dict[str, Tuple[str, ...]] = {
+            ending: tuple(suffixes) for ending, suffixes in suffix_dict.items()
+        }
+        self.max_ending_length = max(map(len, self._suffix_dict), default=0)
+
+        # 辞书形 -> special_rule.json 中能还原为它的键
+        special_dict: Dict[str, Dict[str, None]] = {}
+        for key, outputs in special_rule_dict.items():
+            for output in outputs:
+                special_dict.setdefault(output, {})[key] = None
+        self._special_dict: Dict[str, Tuple[str, ...]] = {
+            output: tuple(keys) for output, keys in special_dict.items()
+        }
+
+    def iter_surface_forms(self, jishokei: str) -> Iterator[str]:
+        """Yields the surface forms that deinflect to the jishokei.
+            逐个生成能还原为该辞书形的非辞书形
+
+        Args:
+            jishokei: A dictionary form, e.g. 食べる.
+
+        Yields:
+            The jishokei itself, then the forms built from its endings, from
+            the shortest ending to the longest, then the special forms;
+            each form is yielded once.
+        """
+        if jishokei == "":
+            return
+        yield jishokei
+        seen = {jishokei}
+        # 至少保留一个字作为词干，否则生成的只是孤立的词尾
+        for ending_length in range(1, min(len(jishokei) - 1, self.max_ending_length) + 1):
+            suffixes = self._suffix_dict.get(jishokei[-ending_length:])
+            if suffixes is None:
+                continue
+            input_stem = jishokei[:-ending_length]
+            for suffix in suffixes:
+                surface_form = input_stem + suffix
+                if surface_form not in seen:
+                    seen.add(surface_form)
+                    yield surface_form
+        for surface_form in self._special_dict.get(jishokei, ()):
+            if surface_form not in seen:
+                seen.add(surface_form)
+                yield surface_form
+
+
+# 最近一次使用的规则快照及由其生成的倒置表
+_generator_cache: Optional[Tuple[RuleSnapshot, SurfaceGenerator]] = None
+
+
+def get_surface_generator(rules: Optional[RuleSnapshot] = None) -> SurfaceGenerator:
+    """Returns the inverted rules of a snapshot, building them on first use.
+        返回规则快照对应的倒置表，首次使用时构建
+
+    Args:
+        rules: The rules to invert, defaults to the current snapshot of rule_registry.
+
+    Returns:
+        The generator of the snapshot.
+    """
+    global _generator_cache  # pylint: disable=W0603
+    if rules is None:
+        rules = rule_registry.snapshot
+    generator_cache = _generator_cache
+    if generator_cache is not None and generator_cache[0] is rules:
+        return generator_cache[1]
+    surface_generator = SurfaceGenerator(
+        rules.conjugate_rule_dict, rules.special_rule_dict
+    )
+    _generator_cache = (rules, surface_generator)
+    return surface_generator
+
+
+def iter_surface_forms(
+    jishokei: str, rules: Optional[RuleSnapshot] = None
+) -> Iterator[str]:
+    """Yields the surface forms that deinflect to the jishokei.
+        逐个生成能还原为该辞书形的非辞书形，见 SurfaceGenerator.iter_surface_forms
+
+    Args:
+        jishokei: A dictionary form, e.g. 食べる.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+
+    Yields:
+        The surface forms.
+    """
+    return get_surface_generator(rules).iter_surface_forms(jishokei)
+
+
+def build_surface_index(
+    jishokei_list: Iterable[str], rules: Optional[RuleSnapshot] = None
+) -> Dict[str, Tuple[str, ...]]:
+    """Precomputes the surface forms of a fixed vocabulary.
+        为固定的词表预先生成所有非辞书形，查询时只需一次字典查找
+
+    Args:
+        jishokei_list: The dictionary forms to expand, e.g. the indexed words
+            of a search engine.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+
+    Returns:
+        jishokei -> its surface forms in the order of iter_surface_forms.
+    """
+    surface_generator = get_surface_generator(rules)
+    return {
+        jishokei: tuple(surface_generator.iter_surface_forms(jishokei))
+        for jishokei in jishokei_list
+    }
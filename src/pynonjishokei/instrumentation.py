@@ -0,0 +1,140 @@
+"""Opt-in instrumentation of the deinflection pipeline.
+
+埋点默认关闭，关闭时热路径只需检查一次 trace_enabled，不会格式化任何日志
+
+Two independent switches: tracing sends one event per candidate to a sink,
+statistics accumulate the wall time of each pipeline stage and a few
+counters, read with stats_snapshot.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+TraceSink = Callable[[str, Dict[str, Any]], None]
+
+# 热路径在调用 emit 前先检查这个开关，关闭时不会构造任何事件参数
+trace_enabled: bool = False
+_trace_sink: Optional[TraceSink] = None
+
+
+def set_trace_sink(sink: Optional[TraceSink]) -> None:
+    """Route trace events to the given sink, or disable tracing with None.
+        设置接收埋点事件的函数，传入 None 时关闭埋点
+
+    Args:
+        sink: A callable receiving the event name and a dict of event fields.
+    """
+    global trace_enabled, _trace_sink
+    _trace_sink = sink
+    trace_enabled = sink is not None
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Send a trace event to the sink.
+        发送埋点事件，调用前应先检查 trace_enabled
+
+    Args:
+        event: The event name, e.g. "conjugate_candidate".
+        **fields: Structured fields of the event.
+    """
+    sink = _trace_sink
+    if sink is not None:
+        sink(event, fields)
+
+
+def logging_sink(logger: Optional[logging.Logger] = None) -> TraceSink:
+    """Create a sink that writes trace events to a logger at DEBUG level.
+        创建将埋点事件写入日志的函数，日志的输出位置由调用方配置
+
+    Args:
+        logger: The logger to write to. Defaults to the "pynonjishokei" logger.
+
+    Returns:
+        A sink for set_trace_sink.
+    """
+    if logger is None:
+        logger = logging.getLogger("pynonjishokei")
+
+    def sink(event: str, fields: Dict[str, Any]) -> None:
+        logger.debug("%s %s", event, fields)
+
+    return sink
+
+
+# 热路径在计时前先检查这个开关，关闭时不会调用 perf_counter
+stats_enabled: bool = False
+_stats_lock = threading.Lock()
+# 阶段名称 -> [调用次数, 累计耗时（秒）]
+_stage_stats: Dict[str, list] = {}
+_counters: Dict[str, int] = {}
+
+
+def enable_stats(enabled: bool = True) -> None:
+    """Start or stop accumulating statistics, keeping what was accumulated.
+        开启或关闭统计，已经累计的数据保留到调用 reset_stats 为止
+
+    Args:
+        enabled: Whether the pipeline records statistics.
+    """
+    global stats_enabled
+    stats_enabled = enabled
+
+
+def add_time(stage: str, seconds: float) -> None:
+    """Add one call of a stage, called only when stats_enabled is set.
+        累计一个阶段的一次调用及其耗时，调用前应先检查 stats_enabled
+
+    Args:
+        stage: The stage name, e.g. "orthography".
+        seconds: The wall time of the call.
+    """
+    with _stats_lock:
+        stage_stats = _stage_stats.get(stage)
+        if stage_stats is None:
+            _stage_stats[stage] = [1, seconds]
+        else:
+            stage_stats[0] += 1
+            stage_stats[1] += seconds
+
+
+def add_count(counter: str, count: int = 1) -> None:
+    """Increase a counter, called only when stats_enabled is set.
+        累加计数，调用前应先检查 stats_enabled
+
+    Args:
+        counter: The counter name, e.g. "prefixes_scanned".
+        count: The amount to add.
+    """
+    with _stats_lock:
+        _counters[counter] = _counters.get(counter, 0) + count
+
+
+def stats_snapshot() -> Dict[str, Any]:
+    """Copy the accumulated statistics.
+        返回当前累计的统计数据的副本
+
+    Stages do not overlap, e.g. the orthography probes made while ranking a
+    prefix are not counted in any other stage, so their times can be added.
+
+    Returns:
+        {"stages": {stage: {"calls": int, "seconds": float}},
+        "counters": {counter: int}}
+    """
+    with _stats_lock:
+        return {
+            "stages": {
+                stage: {"calls": calls, "seconds": seconds}
+                for stage, (calls, seconds) in _stage_stats.items()
+            },
+            "counters": dict(_counters),
+        }
+
+
+def reset_stats() -> None:
+    """Discard the accumulated statistics.
+    清空累计的统计数据
+    """
+    with _stats_lock:
+        _stage_stats.clear()
+        _counters.clear()
@@ -0,0 +1,179 @@
+"""Whole-document lattice of jishokei spans.
+
+文档模式：整篇文档只预处理一次，一次性推导出每个位置开始的所有单词，并可选地求出最优分词结果
+"""
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# pylint: disable=E0402
+from .main import iter_scanned_prefixes  # type: ignore
+from .main import rank_nonjishokei  # type: ignore
+from .main import rule_registry  # type: ignore
+from .preprocess import preprocess  # type: ignore
+from .rules import RuleSnapshot  # type: ignore
+
+# 推导结果的来源：规则推导并经过词库确认、special_rule.json、未经确认的片假名猜测、原文
+SOURCE_RULE = "rule"
+SOURCE_SPECIAL = "special"
+SOURCE_GUESS = "guess"
+SOURCE_INPUT = "input"
+# 单词的最大长度，每个位置只扫描这么长的片段，扫描整篇文档的耗时与文档长度成正比
+MAX_SPAN_LENGTH = 32
+# 最优路径中每个片段的代价：片段越少越好，未经确认的猜测和无法识别的单个字符代价更高
+PATH_COSTS = {SOURCE_RULE: 1.0, SOURCE_SPECIAL: 1.0, SOURCE_GUESS: 1.5, SOURCE_INPUT: 2.0}
+
+
+class Span(NamedTuple):
+    """A jishokei derived from text[start:end] of the preprocessed document.
+    预处理后的文档中 text[start:end] 这一片段可能对应的辞书形
+    """
+
+    start: int
+    end: int
+    jishokei: str
+    source: str
+
+
+class Lattice(NamedTuple):
+    """All the spans of a document.
+    文档的预处理结果和其中的所有片段
+    """
+
+    text: str
+    spans: List[Span]
+
+
+def convert_prefix_spans(
+    scanned_input_text: str, rules: RuleSnapshot
+) -> Tuple[Tuple[str, str], ...]:
+    """Converts one scanned prefix to its jishokei and their sources.
+        推导一个前缀可能对应的辞书形及其来源
+
+    Args:
+        scanned_input_text: A prefix starting at some position of the document.
+        rules: The rules to use.
+
+    Returns:
+        (jishokei, source) pairs in the order of scan_preprocessed_string.
+    """
+    # 与 scan_preprocessed_string 的排序一致：后推导出的结果在前，未经确认的猜测在最后
+    candidate_dict: Dict[str, str] = {}
+    special_output_list = rules.deinflection_automaton.convert_special(
+        scanned_input_text
+    )
+    for special_output_text in reversed(special_output_list or ()):
+        candidate_dict.setdefault(special_output_text, SOURCE_SPECIAL)
+    ranked_candidates = rank_nonjishokei(scanned_input_text, rules)
+    for jishokei in reversed(ranked_candidates.confirmed):
+        candidate_dict.setdefault(jishokei, SOURCE_RULE)
+    for jishokei in reversed(ranked_candidates.guessed):
+        candidate_dict.setdefault(jishokei, SOURCE_GUESS)
+    return tuple(candidate_dict.items())
+
+
+def iter_spans(
+    text: str,
+    rules: Optional[RuleSnapshot] = None,
+    max_span_length: int = MAX_SPAN_LENGTH,
+    cache_size: int = 65536,
+) -> Iterator[Span]:
+    """Yields the spans starting at every position of a preprocessed document.
+        逐个位置扫描已经预处理过的文档
+
+    The same prefix found at different positions is converted only once.
+
+    Args:
+        text: The preprocessed document.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+        max_span_length: The maximum length of a span.
+        cache_size: The maximum number of prefixes whose candidates are kept.
+
+    Yields:
+        The spans ordered by start, then from the longest to the shortest,
+        then by rank.
+    """
+    if rules is None:
+        rules = rule_registry.snapshot
+    # 前缀 -> 推导结果，整篇文档共用
+    converted_prefixes: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+    for start in range(len(text)):
+        scanned_input_list = list(
+            iter_scanned_prefixes(text[start : start + max_span_length], rules)
+        )
+        for scanned_input_text in reversed(scanned_input_list):
+            candidates = converted_prefixes.get(scanned_input_text)
+            if candidates is None:
+                if len(converted_prefixes) >= cache_size:
+                    converted_prefixes.clear()
+                candidates = convert_prefix_spans(scanned_input_text, rules)
+                converted_prefixes[scanned_input_text] = candidates
+            end = start + len(scanned_input_text)
+            for jishokei, source in candidates:
+                yield Span(start, end, jishokei, source)
+
+
+def build_lattice(
+    input_text: str,
+    rules: Optional[RuleSnapshot] = None,
+    max_span_length: int = MAX_SPAN_LENGTH,
+) -> Lattice:
+    """Preprocesses a document once and collects all of its spans.
+        预处理整篇文档，并推导出每个位置开始的所有片段
+
+    Args:
+        input_text: The document, e.g. a chapter of a novel.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+        max_span_length: The maximum length of a span.
+
+    Returns:
+        The preprocessed document, which the span offsets refer to, and the spans.
+    """
+    if rules is None:
+        rules = rule_registry.snapshot
+    text = preprocess(input_text)
+    return Lattice(text, list(iter_spans(text, rules, max_span_length)))
+
+
+def best_path(lattice: Lattice) -> List[Span]:
+    """Segments the document along the cheapest path through the lattice.
+        求出代价最小的分词结果
+
+    Every segment costs PATH_COSTS of its source, so the path prefers fewer,
+    confirmed segments. Letters not covered by any span become single
+    letter segments with the source "input".
+
+    Args:
+        lattice: The result of build_lattice.
+
+    Returns:
+        Spans covering the whole preprocessed document, in order.
+    """
+    text = lattice.text
+    # 每个片段只保留排名最高的推导结果
+    best_spans: Dict[Tuple[int, int], Span] = {}
+    spans_by_start: List[List[Span]] = [[] for _ in range(len(text))]
+    for span in lattice.spans:
+        if (span.start, span.end) not in best_spans:
+            best_spans[(span.start, span.end)] = span
+            spans_by_start[span.start].append(span)
+
+    infinity = float("inf")
+    costs = [0.0] + [infinity] * len(text)
+    previous_spans: List[Optional[Span]] = [None] * (len(text) + 1)
+    for start in range(len(text)):
+        # 每个字符都能单独成为一个片段，所以所有位置都可以到达
+        letter_span = Span(start, start + 1, text[start], SOURCE_INPUT)
+        for span in [*spans_by_start[start], letter_span]:
+            cost = costs[start] + PATH_COSTS[span.source]
+            if cost < costs[span.end]:
+                costs[span.end] = cost
+                previous_spans[span.end] = span
+
+    path: List[Span] = []
+    end = len(text)
+    while end > 0:
+        span = previous_spans[end]
+        path.append(span)
+        end = span.start
+    path.reverse()
+    return path
@@ -1,174 +1,236 @@
 """convert a pynonjishokei to a jishokei"""
 
-import json
 import re
-import logging
-import os
-import sys
-import time
-from typing import Dict, List
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 # pylint: disable=E0402
+from . import instrumentation  # type: ignore
 from .preprocess import preprocess  # type: ignore
 from .preprocess import convert_kata_to_hira  # type: ignore
+from .cache import CacheInfo, LRUCache  # type: ignore
+from .rules import RuleRegistry, RuleSnapshot  # type: ignore
+# 保留原来的导入路径 main.read_rule_file
+from .rules import read_rule_file  # type: ignore # pylint: disable=W0611
 
-logging.basicConfig(
-    handlers=[
-        logging.FileHandler(
-            f"{time.strftime('%Y-%m-%d', time.localtime())}.log", encoding="utf-8"
-        ),
-        logging.StreamHandler(sys.stderr),
-    ],
-    level=logging.DEBUG,
-    format="%(asctime)s %(filename)s %(levelname)s %(message)s",
-    datefmt="%a %d %b %Y %H:%M:%S",
-)
 
+class RankedCandidates(NamedTuple):
+    """Candidates of one string, split by whether the dictionary confirmed them.
+    按是否经过词库确认分开保存的推导结果
 
-def read_rule_file(rule_file: str) -> Dict[str, list[str]]:
-    """read json file
-        加载规则文件
+    Confirmed candidates are dictionary hits and special rules; guessed
+    candidates, e.g. the hiragana of a katakana string, are never checked.
+    """
+
+    confirmed: Tuple[str, ...]
+    guessed: Tuple[str, ...]
+
+
+def probe_orthography(
+    input_text: str, rules: RuleSnapshot
+) -> Optional[Tuple[str, ...]]:
+    """Look up the dictionary forms of a string without copying them.
+        查询词库，直接返回索引中共享的候选词元组，不复制为列表
 
     Args:
-        rule_file: input file path
+        input_text: A form of a word.
+        rules: The rules to use.
 
     Returns:
-        json file content
+        The dictionary forms, or None if the string is not in the index.
     """
-    with open(rule_file, "r", encoding="utf-8") as f:
-        return json.loads(f.read())
-
-
-def convert_orthography(input_text: str) -> list | None:
+    if instrumentation.stats_enabled:
+        started = perf_counter()
+        orthography_candidates = rules.orthography_index.get(input_text)
+        instrumentation.add_time("orthography", perf_counter() - started)
+        instrumentation.add_count("orthography_probes")
+        if orthography_candidates is not None:
+            instrumentation.add_count("orthography_hits")
+        return orthography_candidates
+    return rules.orthography_index.get(input_text)
+
+
+def convert_orthography(
+    input_text: str, rules: Optional[RuleSnapshot] = None
+) -> list | None:
     """convert input text to the form of a word that appears as an entry in a dictionary,
         for example, convert【気づく】to【気付く】
         通过查询确认推导结果是否正确，同时消除假名书写造成的非辞書型，比如【気づく】和【気付く】
 
     Args:
         input_text: a form of a word that will not appear as an entry in a dictionary
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
 
     Returns:
         the form of a word that appears as an entry in a dictionary
     """
-    if input_text in orthography_rule_dict:
-        orthography_list = []
-        for word in orthography_rule_dict[input_text]:
-            if word == "":
-                # 为了节约空间，约定在index.json文件中：空字符串表示和键一样，所以这里直接将键添加到结果中
-                orthography_list.append(input_text)
-            else:
-                orthography_list.append(word)
-        return orthography_list
+    if rules is None:
+        rules = rule_registry.snapshot
+    orthography_candidates = probe_orthography(input_text, rules)
+    if orthography_candidates is not None:
+        # 索引中的空字符串在编译时已经展开为键本身，候选词是共享的字符串对象
+        return list(orthography_candidates)
     else:
         return None
 
 
-def convert_conjugate(input_text: str) -> list | None:
+def convert_conjugate(
+    input_text: str, rules: Optional[RuleSnapshot] = None
+) -> list | None:
     """convert a verb conjugation and adj declension to basic form.
         还原用言的活用变形
 
     Args:
         input_text: A String containing the conjugation.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
 
     Returns:
         The list with conjugation converted to the basic form.
     """
     if len(input_text) == 0:
         return None
-    input_stem = input_text[0:-1]
-    input_last_letter = input_text[-1]
-    process_output_list: list[str] = []
-    # TODO 一段动词的词干必定是え段假名，但对于对于見る这样汉字就是词干的动词特殊来说，可能需要通过穷举来解决问题
-    # 本程序的 input_stem 概念对应的不是一段动词语法意义上的词干
-    # 今日は、寿司を**食べ**に銀座に行いきます。
-    process_text = input_text + "る"
-    process_output_list.append(process_text)
-    # 形容词的口语经常省略
-    process_text = input_text + "い"
-    process_output_list.append(process_text)
-    logging.debug("add %s to %s: for v1", process_text, process_output_list)
-
-    jishokei_last_letter_list = conjugate_rule_dict.get(input_last_letter)
-    if jishokei_last_letter_list is not None:
-        for jishokei_last_letter in jishokei_last_letter_list:
-            process_output_list.append(input_stem + jishokei_last_letter)
-            logging.debug(
-                "add %s to %s: for conjugate rule",
-                input_stem + jishokei_last_letter,
-                process_output_list,
-            )
-
-    # 将输入的字符串作为最后一个结果返回
-    # 因为输入的字符串可能就是正确的辞書型
-    if input_text not in process_output_list:
-        process_output_list.append(input_text)
+    if rules is None:
+        rules = rule_registry.snapshot
+    if instrumentation.stats_enabled:
+        started = perf_counter()
+        process_output_list = rules.deinflection_automaton.convert_conjugate(input_text)
+        instrumentation.add_time("conjugate", perf_counter() - started)
+        instrumentation.add_count("conjugate_candidates", len(process_output_list))
+    else:
+        process_output_list = rules.deinflection_automaton.convert_conjugate(input_text)
+    if instrumentation.trace_enabled:
+        for process_text, rule in rules.deinflection_automaton.explain_conjugate(
+            input_text
+        ):
+            instrumentation.emit("conjugate_candidate", candidate=process_text, rule=rule)
+    return process_output_list
 
-    # 删除其中的重复值，只保留第一次的结果
-    # TODO 列表推导式重写
-    output_list: List[str] = []
-    for i in process_output_list:
-        if i not in output_list:
-            output_list.append(i)
 
-    return output_list
+def match_conjugate(
+    input_text: str, rules: RuleSnapshot
+) -> Tuple[str, Tuple[str, ...]]:
+    """Find the stem and the jishokei endings of a conjugation without building the candidates.
+        找出词干和可以替换的辞书形词尾，每个推导结果由词干和一个词尾拼接而成，需要时再拼接
 
+    Args:
+        input_text: A non-empty string containing the conjugation.
+        rules: The rules to use.
 
-def convert_nonjishokei(input_text: str) -> list:
-    """Convert nonjishokei to jishokei.
-        将体言和用言的非辞书形还原为辞书形
+    Returns:
+        The stem and the tails, in the order of convert_conjugate.
+    """
+    if instrumentation.stats_enabled:
+        started = perf_counter()
+        input_stem, conjugate_tails = rules.deinflection_automaton.match_conjugate(
+            input_text
+        )
+        instrumentation.add_time("conjugate", perf_counter() - started)
+        instrumentation.add_count("conjugate_candidates", len(conjugate_tails))
+        return input_stem, conjugate_tails
+    return rules.deinflection_automaton.match_conjugate(input_text)
+
+
+def rank_nonjishokei(
+    input_text: str, rules: Optional[RuleSnapshot] = None
+) -> RankedCandidates:
+    """Convert nonjishokei to jishokei, keeping dictionary hits apart from guesses.
+        将非辞书形还原为辞书形，并区分经过词库确认的结果和未经确认的猜测
 
     Args:
-        input_text: A String containing the nonjishokei.
+        input_text: A non-empty string containing the nonjishokei.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
 
     Returns:
-        The list with nonjishokei converted to the jishokei.
+        The confirmed and the guessed jishokei, each in the order they were derived.
     """
-    if input_text == "":
-        # FIXME 这个方法本就不该被外部调用，所以不可能传入空字符串
-        return []
-
-    # 保留检查还原结果
-    orthography_list: list[str] = []
+    if rules is None:
+        rules = rule_registry.snapshot
+    # 缓存的键包含快照的编号，重新加载前开始的查询不会写入与新规则不一致的结果，
+    # 其他注册表的快照也不会读到当前规则的结果
+    cache_key = (rules.serial, input_text)
+    cached_output = convert_nonjishokei_cache.get(cache_key)
+    if cached_output is not None:
+        if instrumentation.stats_enabled:
+            instrumentation.add_count("nonjishokei_cache_hits")
+        return cached_output
+
+    # 保留检查还原结果，利用字典的键去除重复值，同时保留第一次出现的顺序
+    orthography_dict: Dict[str, None] = {}
+    guessed_tuple: Tuple[str, ...] = ()
 
     # 还原体言的非辞書形，防止错误推导名词和外来语
-    orthography_text = convert_orthography(input_text)
+    orthography_text = probe_orthography(input_text, rules)
     if orthography_text is not None:
-        orthography_list.extend(set(orthography_text))
+        for orthography_word in orthography_text:
+            orthography_dict[orthography_word] = None
 
     # 还原片假名导致的非辞書形，例如：アツい
     # 为了节约空间，约定 index.json 文件中：统一使用平假名记录辞书形
     # FIXME 为了减少推导结果中的无关结果，应该针对用言优先使用平假名，而体言还是保留平片假名的书写习惯
-    if re.match(r"^[\u30A0-\u30FF]+$", input_text):
-        # 如果全为片假名书写，说明是极有可能外来语，为了节省空间，直接返回结果
-        input_text = convert_kata_to_hira(input_text)
-        orthography_list.append(input_text)
+    stats_enabled = instrumentation.stats_enabled
+    if stats_enabled:
+        started = perf_counter()
+    hira_text = convert_kata_to_hira(input_text)
+    # 去掉所有片假名后为空即全为片假名，不使用正则匹配，避免每次分配约 1KB 的临时内存
+    is_all_katakana = input_text != "" and input_text.strip(KATAKANA_LETTERS) == ""
+    if stats_enabled:
+        instrumentation.add_time("katakana", perf_counter() - started)
+    if is_all_katakana:
+        # 如果全为片假名书写，说明是极有可能外来语，为了节省空间，不经确认直接作为猜测返回
+        guessed_tuple = (hira_text,)
     else:
         # 如果不全为片假名，那么一般是特殊情况，需要判断是否真实存在，再添加到结果中
-        input_text = convert_kata_to_hira(input_text)
-        orthography_text = convert_orthography(input_text)
+        orthography_text = probe_orthography(hira_text, rules)
         if orthography_text is not None:
-            # 获取辞书形
-            # TODO 注意这里的逻辑其实可以优化233
-            orthography_list.extend(set(orthography_text))
+            for orthography_word in orthography_text:
+                orthography_dict[orthography_word] = None
 
     # 还原动词的活用变形
-    converted_conjugate_list = convert_conjugate(input_text)
-    if converted_conjugate_list is None:
-        return []
-    logging.debug("all converted conjugate list: %s", converted_conjugate_list)
-    for converted_word in converted_conjugate_list:
-        orthography_text = convert_orthography(converted_word)
+    if instrumentation.trace_enabled:
+        converted_conjugate_list = convert_conjugate(hira_text, rules)
+        instrumentation.emit("conjugate_candidates", candidates=converted_conjugate_list)
+        input_stem, conjugate_tails = "", tuple(converted_conjugate_list)
+    else:
+        # 逐个拼接并查询推导结果，不同时保留所有推导结果
+        input_stem, conjugate_tails = match_conjugate(hira_text, rules)
+    for tail in conjugate_tails:
+        orthography_text = probe_orthography(input_stem + tail, rules)
         if orthography_text is not None:
-            # 获取辞书形
-            # TODO 注意这里的逻辑其实可以优化233
-            orthography_list.extend(set(orthography_text))
-    output_list = []
-    # TODO 列表推导式重写
-    # TODO 这里可以试着读取用户配置的默认最大推导输出数量，然后返回列表的前几项
-    # 注意能这样做的前提是列表的排序有一定的规则可循
-    for orthography_word in orthography_list:
-        output_list.append(orthography_word)
-    return output_list
+            for orthography_word in orthography_text:
+                orthography_dict[orthography_word] = None
+    if hira_text in orthography_dict:
+        guessed_tuple = ()
+    ranked_candidates = RankedCandidates(tuple(orthography_dict), guessed_tuple)
+    if stats_enabled:
+        instrumentation.add_count("confirmed_candidates", len(ranked_candidates.confirmed))
+        instrumentation.add_count("guessed_candidates", len(guessed_tuple))
+    convert_nonjishokei_cache.put(cache_key, ranked_candidates)
+    return ranked_candidates
+
+
+def convert_nonjishokei(
+    input_text: str,
+    max_results: Optional[int] = None,
+    rules: Optional[RuleSnapshot] = None,
+) -> list:
+    """Convert nonjishokei to jishokei.
+        将体言和用言的非辞书形还原为辞书形
+
+    Args:
+        input_text: A String containing the nonjishokei.
+        max_results: The maximum number of results, None returns all of them.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+
+    Returns:
+        The list with nonjishokei converted to the jishokei, dictionary hits
+        before the unconfirmed guesses.
+    """
+    if input_text == "":
+        # FIXME 这个方法本就不该被外部调用，所以不可能传入空字符串
+        return []
+    ranked_candidates = rank_nonjishokei(input_text, rules)
+    output_list = [*ranked_candidates.confirmed, *ranked_candidates.guessed]
+    return output_list if max_results is None else output_list[:max_results]
 
 
 def contains_japanese_characters(input_text: str) -> bool:
@@ -185,85 +247,374 @@ def contains_japanese_characters(input_text: str) -> bool:
     return bool(re.search(pattern, input_text))
 
 
-def scan_input_string(input_text: str) -> list:
-    """Scans the input string by Maximum Matching and returns a list of possible jishokei.
-        采用最长一致法扫描字符串，推导并返回所有可能的辞书形
+def iter_scanned_prefixes(
+    input_text: str,
+    rules: Optional[RuleSnapshot] = None,
+    max_katakana_length: Optional[int] = None,
+) -> Iterator[str]:
+    """Yields the prefixes of the input string that may still be deinflected.
+        按前缀树逐字扫描字符串，没有任何词条能延续当前前缀时停止扫描
+
+    Every candidate of a prefix is built from the prefix without an
+    inflection ending of at most max_conjugate_length letters, so once none
+    of those stems is the beginning of any key in the orthography index, no
+    longer prefix can produce a dictionary hit either. Prefixes written only
+    in katakana are returned as guesses without a dictionary hit, so they
+    keep the scan going, up to max_katakana_length letters when given.
 
     Args:
-        input_text: The string to scan.
+        input_text: The preprocessed string to scan.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+        max_katakana_length: The longest katakana-only prefix that keeps the
+            scan going, None means no limit.
 
-    Returns:
-        A list of converted jishokei.
+    Yields:
+        The prefixes of input_text, from the shortest to the longest.
     """
-    if input_text == "":
-        return []
-    # 不含假名和汉字时直接退出
-    if contains_japanese_characters(input_text) is False:
-        return [input_text]
+    if rules is None:
+        rules = rule_registry.snapshot
+    orthography_index = rules.orthography_index
+    special_prefix_set = rules.deinflection_automaton.special_prefix_set
+    # 词尾规则最多能去掉的字数，用户规则中可能包含多个字的词尾
+    max_ending_length = max(rules.deinflection_automaton.max_conjugate_length, 1)
+    hira_text = convert_kata_to_hira(input_text)
+    # 分别记录原文和平假名化后的词干在索引中对应的范围
+    stem_range = (0, len(orthography_index))
+    hira_stem_range = stem_range
+    # 仍是索引中某个键的开头的最长词干的长度
+    live_stem_length = 0
+    is_all_katakana = True
+    for input_index, input_letter in enumerate(input_text):
+        if input_index > 0:
+            if stem_range[0] < stem_range[1]:
+                stem_range = orthography_index.prefix_range(
+                    input_text[:input_index], *stem_range
+                )
+            if hira_stem_range[0] < hira_stem_range[1]:
+                hira_stem_range = orthography_index.prefix_range(
+                    hira_text[:input_index], *hira_stem_range
+                )
+            if stem_range[0] < stem_range[1] or hira_stem_range[0] < hira_stem_range[1]:
+                live_stem_length = input_index
+        scanned_input_text = input_text[: input_index + 1]
+        # 全为片假名的前缀不经词库确认就会被添加到结果中，所以需要继续扫描，
+        # 但只需要超过长度上限的猜测的调用方可以提前停止
+        is_all_katakana = (
+            is_all_katakana
+            and "\u30a0" <= input_letter <= "\u30ff"
+            and (max_katakana_length is None or input_index < max_katakana_length)
+        )
+        if (
+            input_index + 1 - live_stem_length > max_ending_length
+            and scanned_input_text not in special_prefix_set
+            and not is_all_katakana
+        ):
+            return
+        yield scanned_input_text
+
+
+def rank_scanned_prefix(
+    scanned_input_text: str, rules: Optional[RuleSnapshot] = None
+) -> RankedCandidates:
+    """Converts one scanned prefix to all possible jishokei, ranked by confirmation.
+        推导扫描过程中的一个前缀可能对应的所有辞书形，并区分是否经过确认
 
-    # 预处理
-    input_text = preprocess(input_text)
-
-    # 记录扫描的临时字符串
-    scanned_input_list: List[str] = []
-    # 记录扫描过程中的推导结果
-    scanned_process_list: List[str] = []
-    for input_index in range(len(input_text) + 1):
-        scanned_input_text = input_text[0 : input_index + 1]
-        logging.debug("scanned_input_text: %s", scanned_input_text)
-        #
-        scanned_input_list.append(scanned_input_text)
-        # 基于现代日语语法将非辞書形还原为辞书形
-        converted_jishokei_list = convert_nonjishokei(scanned_input_text)
-        for converted_jishokei_text in converted_jishokei_list:
-            logging.debug(
-                "add %s to scanned_process_list for converted jishokei",
-                converted_jishokei_text,
+    Args:
+        scanned_input_text: A prefix of the preprocessed input string.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+
+    Returns:
+        The jishokei converted by the rules followed by those of
+        special_rule.json, and the unconfirmed guesses.
+    """
+    if rules is None:
+        rules = rule_registry.snapshot
+    # 基于现代日语语法将非辞書形还原为辞书形
+    ranked_candidates = rank_nonjishokei(scanned_input_text, rules)
+    if instrumentation.trace_enabled:
+        for converted_jishokei_text in (
+            *ranked_candidates.confirmed,
+            *ranked_candidates.guessed,
+        ):
+            instrumentation.emit(
+                "scan_candidate", candidate=converted_jishokei_text, source="rule"
             )
-            scanned_process_list.append(converted_jishokei_text)
 
-        # 将 rule\special_rule.json 内记录特殊规则的非辞書形还原为辞书形
-        special_output_list = special_rule_dict.get(scanned_input_text)
+    # 将 rule\special_rule.json 内记录特殊规则的非辞書形还原为辞书形
+    if instrumentation.stats_enabled:
+        started = perf_counter()
+        special_output_list = rules.deinflection_automaton.convert_special(
+            scanned_input_text
+        )
+        instrumentation.add_time("special", perf_counter() - started)
         if special_output_list is not None:
+            instrumentation.add_count("special_candidates", len(special_output_list))
+    else:
+        special_output_list = rules.deinflection_automaton.convert_special(
+            scanned_input_text
+        )
+    if special_output_list is not None:
+        if instrumentation.trace_enabled:
             for special_output_text in special_output_list:
-                logging.debug(
-                    "add %s to scanned_process_list for special rule",
-                    special_output_text,
+                instrumentation.emit(
+                    "scan_candidate", candidate=special_output_text, source="special"
                 )
-                scanned_process_list.append(special_output_text)
+        ranked_candidates = RankedCandidates(
+            ranked_candidates.confirmed + special_output_list, ranked_candidates.guessed
+        )
+
+    return ranked_candidates
+
+
+def convert_scanned_prefix(
+    scanned_input_text: str, rules: Optional[RuleSnapshot] = None
+) -> list:
+    """Converts one scanned prefix to all possible jishokei.
+        推导扫描过程中的一个前缀可能对应的所有辞书形
+
+    Args:
+        scanned_input_text: A prefix of the preprocessed input string.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+
+    Returns:
+        The confirmed jishokei, see rank_scanned_prefix, followed by the guesses.
+    """
+    ranked_candidates = rank_scanned_prefix(scanned_input_text, rules)
+    return [*ranked_candidates.confirmed, *ranked_candidates.guessed]
 
-        # TODO 用户自定义的转换规则
 
-    # 返回给用户的扫描结果
-    scanned_output_list: List[str] = []
+def scan_preprocessed_string(
+    input_text: str,
+    convert_prefix: Callable[[str, RuleSnapshot], RankedCandidates] = rank_scanned_prefix,
+    max_results: Optional[int] = None,
+    rules: Optional[RuleSnapshot] = None,
+) -> list:
+    """Scans an already preprocessed string and returns a list of possible jishokei.
+        扫描已经预处理过的字符串，推导并返回所有可能的辞书形
+
+    Results are ranked by the length of the prefix they were derived from,
+    longest first, with every dictionary hit before every unconfirmed guess;
+    the input itself comes last. Prefixes are converted from the longest one,
+    so the scan stops as soon as max_results confirmed results are known and
+    the top results equal the beginning of the full list.
+
+    Args:
+        input_text: The preprocessed string to scan.
+        convert_prefix: Converts one scanned prefix, see rank_scanned_prefix.
+        max_results: The maximum number of results, None returns all of them.
+        rules: The rules to use, defaults to the current snapshot of rule_registry.
+
+    Returns:
+        A list of converted jishokei.
+    """
+    # 整个扫描过程使用同一份规则快照，不受扫描期间重新加载规则的影响
+    if rules is None:
+        rules = rule_registry.snapshot
+    stats_enabled = instrumentation.stats_enabled
+    if stats_enabled:
+        started = perf_counter()
+    # 是否继续扫描只取决于索引，所以可以先列出所有前缀，再从最长的前缀开始推导
+    scanned_input_list = list(iter_scanned_prefixes(input_text, rules))
+    if stats_enabled:
+        instrumentation.add_time("prefix_scan", perf_counter() - started)
+    # 返回给用户的扫描结果，利用字典的键去除重复值，同时保留第一次出现的顺序
+    confirmed_output_dict: Dict[str, None] = {}
+    guessed_output_dict: Dict[str, None] = {}
     # 优先展示更长字符串的扫描结果，提高复合动词的使用体验
-    for scanned_process_text in reversed(scanned_process_list):
-        # 只添加第一次的推导结果
-        if scanned_process_text not in scanned_output_list:
-            # 不添加扫描过程中的临时字符串
-            # TODO 直接删除可能会导致意想不到的问题
-            # 如果输入的字符串就是原型：食べる。
-            # 更好的做法应该是同时判断是否在用户自己构建的辞典索引中
-            # if scanned_process_text not in scanned_input_list:
+    for scanned_input_text in reversed(scanned_input_list):
+        if instrumentation.trace_enabled:
+            instrumentation.emit("scan_prefix", prefix=scanned_input_text)
+        if stats_enabled:
+            instrumentation.add_count("prefixes_scanned")
+        ranked_candidates = convert_prefix(scanned_input_text, rules)
+        # 同一前缀中后推导出的结果排在前面
+        for scanned_process_text in reversed(ranked_candidates.confirmed):
+            confirmed_output_dict[scanned_process_text] = None
+        for scanned_process_text in reversed(ranked_candidates.guessed):
+            guessed_output_dict[scanned_process_text] = None
+        # 更短前缀的推导结果只会排在后面，已有足够的确认结果时停止扫描
+        if max_results is not None and len(confirmed_output_dict) >= max_results:
+            break
+
+    if stats_enabled:
+        started = perf_counter()
+    # TODO 直接删除扫描过程中的临时字符串可能会导致意想不到的问题
+    # 如果输入的字符串就是原型：食べる。
+    # 更好的做法应该是同时判断是否在用户自己构建的辞典索引中
+    scanned_output_list = list(confirmed_output_dict)
+    for scanned_process_text in guessed_output_dict:
+        if scanned_process_text not in confirmed_output_dict:
             scanned_output_list.append(scanned_process_text)
 
     # 将输入的字符串作为最后一个结果返回
     # 方便用户在程序无法推导出正确结果时快速编辑
-    if input_text not in scanned_output_list:
-        logging.debug("add input_text %s to scanned_output_list", input_text)
+    if input_text not in confirmed_output_dict and input_text not in guessed_output_dict:
+        if instrumentation.trace_enabled:
+            instrumentation.emit("scan_candidate", candidate=input_text, source="input")
         scanned_output_list.append(input_text)
+    if stats_enabled:
+        instrumentation.add_time("dedupe", perf_counter() - started)
+
+    return scanned_output_list if max_results is None else scanned_output_list[:max_results]
+
+
+def timed_preprocess(input_text: str) -> str:
+    """Runs preprocess, recording its time when statistics are enabled.
+    调用 preprocess，开启统计时记录其耗时
+    """
+    if instrumentation.stats_enabled:
+        started = perf_counter()
+        preprocessed_text = preprocess(input_text)
+        instrumentation.add_time("preprocess", perf_counter() - started)
+        return preprocessed_text
+    return preprocess(input_text)
 
+
+def scan_input_string(input_text: str, max_results: Optional[int] = None) -> list:
+    """Scans the input string by Maximum Matching and returns a list of possible jishokei.
+        采用最长一致法扫描字符串，推导并返回所有可能的辞书形
+
+    Args:
+        input_text: The string to scan.
+        max_results: The maximum number of results, e.g. the entries a popup
+            can show. The results are the beginning of the full list, see
+            scan_preprocessed_string for the ranking.
+
+    Returns:
+        A list of converted jishokei.
+    """
+    if input_text == "" or max_results == 0:
+        return []
+    # 不含假名和汉字时直接退出
+    if contains_japanese_characters(input_text) is False:
+        return [input_text]
+    rules = rule_registry.snapshot
+    cache_key = (rules.serial, input_text)
+    cached_output = scan_input_string_cache.get(cache_key)
+    if cached_output is not None:
+        if instrumentation.stats_enabled:
+            instrumentation.add_count("scan_cache_hits")
+        return list(cached_output[:max_results])
+
+    # 预处理
+    preprocessed_text = timed_preprocess(input_text)
+    if max_results is not None:
+        # 提前停止的扫描结果并不完整，所以不写入缓存
+        return scan_preprocessed_string(
+            preprocessed_text, max_results=max_results, rules=rules
+        )
+    scanned_output_list = scan_preprocessed_string(preprocessed_text, rules=rules)
+    scan_input_string_cache.put(cache_key, tuple(scanned_output_list))
     return scanned_output_list
 
 
-CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
-RULE_PATH = os.path.join(CURRENT_PATH, "rule")
-orthography_rule_path: str = os.path.join(RULE_PATH, "index.json")
-orthography_rule_dict: Dict[str, list[str]] = read_rule_file(orthography_rule_path)
-conjugate_rule_path: str = os.path.join(RULE_PATH, "conjugate_rule.json")
-conjugate_rule_dict: Dict[str, list[str]] = read_rule_file(conjugate_rule_path)
-special_rule_path: str = os.path.join(RULE_PATH, "special_rule.json")
-special_rule_dict: Dict[str, list[str]] = read_rule_file(special_rule_path)
+def scan_many(input_texts: Iterable[str], cache_size: int = 65536) -> Iterator[list]:
+    """Scans many strings lazily, sharing work between repeated inputs.
+        批量扫描字符串，同一批次内重复的输入、预处理结果和前缀只推导一次
+
+    The results are the same as calling scan_input_string on every input.
+
+    Args:
+        input_texts: The strings to scan, e.g. the tokens of a corpus.
+        cache_size: The maximum number of entries kept by each of the batch caches.
+
+    Yields:
+        The list of converted jishokei of each input, in input order.
+    """
+    # 输入 -> 结果、预处理后的字符串 -> 结果、前缀 -> 推导结果
+    scanned_results: Dict[str, Tuple[str, ...]] = {}
+    preprocessed_results: Dict[str, Tuple[str, ...]] = {}
+    converted_prefixes: Dict[str, RankedCandidates] = {}
+    # 同一批次使用同一份规则快照，所以批次内的缓存无需区分规则版本
+    rules = rule_registry.snapshot
+
+    def convert_prefix(
+        scanned_input_text: str, snapshot: RuleSnapshot
+    ) -> RankedCandidates:
+        ranked_candidates = converted_prefixes.get(scanned_input_text)
+        if ranked_candidates is None:
+            if len(converted_prefixes) >= cache_size:
+                converted_prefixes.clear()
+            ranked_candidates = rank_scanned_prefix(scanned_input_text, snapshot)
+            converted_prefixes[scanned_input_text] = ranked_candidates
+        return ranked_candidates
+
+    for input_text in input_texts:
+        scanned_result = scanned_results.get(input_text)
+        if scanned_result is None:
+            if input_text == "" or contains_japanese_characters(input_text) is False:
+                scanned_result = tuple(scan_input_string(input_text))
+            else:
+                preprocessed_text = timed_preprocess(input_text)
+                scanned_result = preprocessed_results.get(preprocessed_text)
+                if scanned_result is None:
+                    if len(preprocessed_results) >= cache_size:
+                        preprocessed_results.clear()
+                    scanned_result = tuple(
+                        scan_preprocessed_string(
+                            preprocessed_text, convert_prefix, rules=rules
+                        )
+                    )
+                    preprocessed_results[preprocessed_text] = scanned_result
+            if len(scanned_results) >= cache_size:
+                scanned_results.clear()
+            scanned_results[input_text] = scanned_result
+        yield list(scanned_result)
+
+
+def configure_cache(maxsize: int) -> None:
+    """Set the maximum number of results kept by each result cache.
+        设置 convert_nonjishokei 和 scan_input_string 结果缓存的容量
+
+    Args:
+        maxsize: The maximum number of cached inputs, 0 disables caching.
+    """
+    convert_nonjishokei_cache.resize(maxsize)
+    scan_input_string_cache.resize(maxsize)
+
+
+def cache_info() -> Dict[str, CacheInfo]:
+    """Report the hit, miss and eviction counters of the result caches.
+        返回结果缓存的统计数据
+
+    Returns:
+        The statistics keyed by the name of the cached function.
+    """
+    return {
+        "convert_nonjishokei": convert_nonjishokei_cache.info(),
+        "scan_input_string": scan_input_string_cache.info(),
+    }
+
+
+def clear_cache() -> None:
+    """Remove all cached results.
+    清空结果缓存
+    """
+    convert_nonjishokei_cache.clear()
+    scan_input_string_cache.clear()
+
+
+def reload_rules(**kwargs) -> RuleSnapshot:
+    """(Re)load the rule files and invalidate the result caches.
+        重新加载规则文件，同时清空依赖旧规则的结果缓存
+
+    Args:
+        **kwargs: New rule paths or a compiled index, see RuleRegistry.reload.
+
+    Returns:
+        The new snapshot of the rules.
+    """
+    return rule_registry.reload(**kwargs)
+
+
+# 片假名区块（U+30A0–U+30FF）中的所有字符
+KATAKANA_LETTERS = "".join(map(chr, range(0x30A0, 0x3100)))
+# 推导结果只依赖输入和规则，所以可以缓存，缓存中保存不可变的元组，返回时复制为列表
+convert_nonjishokei_cache = LRUCache()
+scan_input_string_cache = LRUCache()
+# 当前使用的规则，重新加载时整体替换，查询过程中始终使用同一份快照
+rule_registry = RuleRegistry()
+rule_registry.add_listener(lambda snapshot: clear_cache())
 
 
 def main():
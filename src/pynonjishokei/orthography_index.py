@@ -0,0 +1,272 @@
+"""Compiled, memory-mapped orthography index.
+
+rule/index.json 编译后的二进制索引，查询时直接通过 mmap 读取，无需在导入时构建字典
+
+File layout (all integers are little-endian uint32):
+
+    magic (4 bytes) | version | key count N | string count M
+    key offsets       (N + 1 integers, relative to the key blob)
+    candidate offsets (N + 1 integers, positions in the candidate ids)
+    candidate ids     (the candidates of each key, as positions in the string table)
+    string offsets    (M + 1 integers, relative to the string blob)
+    key blob          (UTF-8 keys, sorted by their encoded bytes)
+    string blob       (UTF-8 candidates, each distinct candidate stored once)
+
+The "" of index.json, which means the same as the key, is replaced by the key
+when compiling, so lookups return the candidates as they are.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"NJKI"
+VERSION = 2
+_HEADER = struct.Struct("<4sIII")
+
+
+def compile_orthography_index(rule_dict: Dict[str, List[str]]) -> bytes:
+    """Compile the orthography rule dict into the binary index format.
+        将 index.json 的内容编译为二进制索引
+
+    Args:
+        rule_dict: The content of rule/index.json.
+
+    Returns:
+        The compiled index.
+    """
+    encoded_items = sorted((key.encode("utf-8"), key) for key in rule_dict)
+    # 字符串表：相同的候选词只保存一次，各个键通过编号引用
+    string_ids: Dict[str, int] = {}
+    key_offsets = array("I", [0])
+    candidate_offsets = array("I", [0])
+    candidate_ids = array("I")
+    for encoded_key, key in encoded_items:
+        key_offsets.append(key_offsets[-1] + len(encoded_key))
+        for candidate in rule_dict[key]:
+            # 为了节约空间，约定在index.json文件中：空字符串表示和键一样，编译时直接展开
+            candidate_ids.append(
+                string_ids.setdefault(candidate or key, len(string_ids))
+            )
+        candidate_offsets.append(len(candidate_ids))
+    encoded_strings = [string.encode("utf-8") for string in string_ids]
+    string_offsets = array("I", [0])
+    for encoded_string in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded_string))
+    integer_arrays = [key_offsets, candidate_offsets, candidate_ids, string_offsets]
+    if sys.byteorder != "little":
+        for integers in integer_arrays:
+            integers.byteswap()
+    return b"".join(
+        [
+            _HEADER.pack(MAGIC, VERSION, len(encoded_items), len(encoded_strings)),
+            *(integers.tobytes() for integers in integer_arrays),
+            b"".join(encoded_key for encoded_key, _ in encoded_items),
+            b"".join(encoded_strings),
+        ]
+    )
+
+
+def build_orthography_index(json_path: str, index_path: str) -> None:
+    """Compile rule/index.json into a binary index file.
+        构建步骤：将 rule/index.json 编译为二进制索引文件
+
+    Args:
+        json_path: Path of rule/index.json.
+        index_path: Path where the compiled index is saved.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        compiled_index = compile_orthography_index(json.loads(f.read()))
+    # 先写入临时文件再替换，防止其他进程读到写了一半的索引
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(compiled_index)
+    os.replace(temp_path, index_path)
+
+
+class OrthographyIndex:
+    """Read-only view of a compiled orthography index.
+    只读的二进制索引，多个进程可以通过页缓存共享同一份索引
+    """
+
+    def __init__(self, buffer):
+        magic, version, count, string_count = (
+            _HEADER.unpack_from(buffer, 0)
+            if len(buffer) >= _HEADER.size
+            else (None, None, 0, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a compiled orthography index")
+        self._buffer = buffer
+        self._count = count
+        integers = memoryview(buffer)[_HEADER.size :]
+        # 文件被截断时抛出 ValueError 而不是 struct.error，调用方据此重新构建索引
+        if len(integers) < 4 * 2 * (count + 1):
+            raise ValueError("truncated orthography index")
+        # 候选词编号的数量记录在候选词偏移量的最后一项中
+        candidate_count_position = 2 * (count + 1) - 1
+        candidate_count = struct.unpack_from(
+            "<I", integers, 4 * candidate_count_position
+        )[0]
+        integer_count = 2 * (count + 1) + candidate_count + string_count + 1
+        if len(integers) < 4 * integer_count:
+            raise ValueError("truncated orthography index")
+        integers = integers[: 4 * integer_count]
+        if sys.byteorder == "little":
+            integers = integers.cast("I")
+        else:
+            integers = array("I", integers)
+            integers.byteswap()
+        self._key_offsets = integers[: count + 1]
+        self._candidate_offsets = integers[count + 1 : 2 * (count + 1)]
+        self._candidate_ids = integers[
+            2 * (count + 1) : 2 * (count + 1) + candidate_count
+        ]
+        self._string_offsets = integers[2 * (count + 1) + candidate_count :]
+        self._key_base = _HEADER.size + 4 * integer_count
+        self._string_base = self._key_base + self._key_offsets[count]
+        if len(buffer) < self._string_base + self._string_offsets[string_count]:
+            raise ValueError("truncated orthography index")
+        # 已经解码的候选词，按编号共享，同一个候选词在进程中只有一个 str 对象
+        self._strings: List[Optional[str]] = [None] * string_count
+
+    @classmethod
+    def from_file(cls, index_path: str) -> "OrthographyIndex":
+        """Memory-map a compiled index file.
+            通过 mmap 打开二进制索引文件
+
+        Args:
+            index_path: Path of the compiled index.
+
+        Returns:
+            The index backed by the mapped file.
+        """
+        with open(index_path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key.encode("utf-8")) >= 0
+
+    def _key(self, position: int) -> bytes:
+        start = self._key_base + self._key_offsets[position]
+        end = self._key_base + self._key_offsets[position + 1]
+        return self._buffer[start:end]
+
+    def _lower_bound(self, encoded_key: bytes, low: int = 0, high: int = -1) -> int:
+        if high < 0:
+            high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < encoded_key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, encoded_key: bytes) -> int:
+        position = self._lower_bound(encoded_key)
+        if position < self._count and self._key(position) == encoded_key:
+            return position
+        return -1
+
+    def prefix_range(self, prefix: str, low: int = 0, high: int = -1) -> Tuple[int, int]:
+        """Find the positions of all keys starting with the prefix.
+            查找以 prefix 开头的所有键，相当于在前缀树上向下走一步
+
+        Keys are sorted, so the keys sharing a prefix form a contiguous range.
+        Passing the range of a shorter prefix narrows the search incrementally.
+
+        Args:
+            prefix: The prefix to look up.
+            low: Start of the range of a shorter prefix.
+            high: End of the range of a shorter prefix, -1 means the whole index.
+
+        Returns:
+            The range [low, high) of matching keys, empty if low == high.
+        """
+        if high < 0:
+            high = self._count
+        encoded_prefix = prefix.encode("utf-8")
+        low = self._lower_bound(encoded_prefix, low, high)
+        # 0xFF 不会出现在 UTF-8 编码中，所以它比任何以 prefix 开头的键都大
+        high = self._lower_bound(encoded_prefix + b"\xff", low, high)
+        return low, high
+
+    def _string(self, string_id: int) -> str:
+        string = self._strings[string_id]
+        if string is None:
+            start = self._string_base + self._string_offsets[string_id]
+            end = self._string_base + self._string_offsets[string_id + 1]
+            string = self._buffer[start:end].decode("utf-8")
+            self._strings[string_id] = string
+        return string
+
+    def get(self, key: str) -> Optional[Tuple[str, ...]]:
+        """Look up the candidates of a key.
+            查询键对应的辞书形
+
+        Args:
+            key: A form of a word.
+
+        Returns:
+            The candidates recorded in rule/index.json, with "" already
+            replaced by the key, or None if the key is missing.
+        """
+        position = self._find(key.encode("utf-8"))
+        if position < 0:
+            return None
+        candidate_ids = self._candidate_ids[
+            self._candidate_offsets[position] : self._candidate_offsets[position + 1]
+        ]
+        return tuple(map(self._string, candidate_ids))
+
+
+def load_orthography_index(json_path: str, index_path: str) -> OrthographyIndex:
+    """Load the compiled index, rebuilding it when rule/index.json is newer.
+        加载二进制索引，如果 rule/index.json 更新过则重新编译
+
+    Args:
+        json_path: Path of rule/index.json.
+        index_path: Path of the compiled index.
+
+    Returns:
+        The loaded index.
+    """
+    if os.path.exists(index_path) and (
+        not os.path.exists(json_path)
+        or os.path.getmtime(index_path) >= os.path.getmtime(json_path)
+    ):
+        try:
+            return OrthographyIndex.from_file(index_path)
+        except ValueError:
+            # 旧版本的索引文件，重新编译
+            if not os.path.exists(json_path):
+                raise
+    try:
+        build_orthography_index(json_path, index_path)
+    except OSError:
+        # 安装目录只读时无法保存编译结果，退而在内存中编译
+        with open(json_path, "r", encoding="utf-8") as f:
+            return OrthographyIndex(compile_orthography_index(json.loads(f.read())))
+    return OrthographyIndex.from_file(index_path)
+
+
+def main():
+    """Command line entry of the build step.
+    用法：python -m pynonjishokei.orthography_index [index.json] [index.bin]
+    """
+    rule_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule")
+    json_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(rule_path, "index.json")
+    index_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(rule_path, "index.bin")
+    build_orthography_index(json_path, index_path)
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -3,6 +3,73 @@
 import re
 import unicodedata
 
+# 所有正则表达式在导入时编译一次，预处理时直接复用
+# 通过检查注音符号前的字符串是否是汉字，判断是否是在为汉字注音
+# 汉字的 Unicode 编码范围请参考下面的链接
+# https://www.unicode.org/charts/
+_WORD_RUBY_KANJI_RE = re.compile(
+    r"""(?P<cjk_unified_ideographs>[一-鿿])|
+ {12}(?P<extension_a>[㐀-䶿])|
+ {12}(?P<extension_b>[ 0-⩭F])|
+ {12}(?P<extension_c>[⩰0-⭳8])|
+ {12}(?P<extension_d>[⭴0-⮁D])|
+ {12}(?P<extension_e>[⮂0-⳪1])|
+ {12}(?P<extension_f>[Ⳬ0-⺾0])|
+ {12}(?P<extension_g>[　0-⌓4A])|
+ {12}(?P<extension_h>[ㄵ0-㈺F])|
+ {12}(?P<extension_i>[⺿0-⻥F])([(（《])(.*?)
+"""
+)
+_WORD_RUBY_RE = re.compile(r"([(（《])[぀-ゟ]*?([)）》])")
+_REPEATED_SINGLE_SIGN_RE = re.compile(r"^(.*?)(々|〻|ゝ|ヽ)(.*?)$")
+_REPEATED_SINGLE_DAKU_SIGN_RE = re.compile(
+    r"^(?P<pre_sign_text>.*?)(?P<daku_pre_char>\w{1})(ヾ|ゞ)(?P<post_sign_text>.*?)$"
+)
+_REPEATED_DOUBLE_SIGN_RE = re.compile(r"^(?P<pre_sign_text>.+)(〳〵|／＼|〱)$")
+_REPEATED_DOUBLE_DAKU_SIGN_RE = re.compile(
+    r"^(?P<pre_sign_text>.*?)(〴〵|／″＼)(?P<post_sign_text>.*?)$"
+)
+_NOT_KANA_RE = re.compile(r"[^\u3040-\u30ff]")
+_KANA_RE = re.compile(r"([\u3040-\u30ff])(.*?)")
+# 片假名和平假名的 Unicode 编码相差 96，关于取值范围，请阅读下面的链接
+# Read url for why the range is 12448 to 12534
+# https://www.unicode.org/charts/PDF/U30A0.pdf
+_KATA_TO_HIRA_TABLE = {code: code - 96 for code in range(12448, 12535)}
+# ぁ(12353) 到 ゖ(12438)
+_HIRA_TO_KATA_TABLE = {code: code + 96 for code in range(12353, 12439)}
+# 半角片假名及符号（U+FF61 到 U+FF9F）与全角字符的对应关系
+_HALF_TO_FULL_KATA_TABLE = {
+    code: unicodedata.normalize("NFKC", chr(code)) for code in range(0xFF61, 0xFFA0)
+}
+_FULL_TO_HALF_KATA_TABLE = {
+    ord(full_char): chr(code)
+    for code, full_char in _HALF_TO_FULL_KATA_TABLE.items()
+    if len(full_char) == 1
+}
+# 半角假名加浊音、半浊音符号的两个字符对应一个全角假名，例：ｶﾞ→ガ
+_HALF_VOICED_KATA_DICT = {
+    chr(code) + sound_mark: voiced_char
+    for code, full_char in _HALF_TO_FULL_KATA_TABLE.items()
+    for sound_mark, combining_mark in (("\uff9e", "\u3099"), ("\uff9f", "\u309a"))
+    for voiced_char in [unicodedata.normalize("NFC", full_char + combining_mark)]
+    if len(voiced_char) == 1
+}
+_FULL_TO_HALF_KATA_TABLE.update(
+    {
+        ord(voiced_char): half_chars
+        for half_chars, voiced_char in _HALF_VOICED_KATA_DICT.items()
+    }
+)
+_HALF_VOICED_KATA_RE = re.compile("|".join(_HALF_VOICED_KATA_DICT))
+# OCR 识别结果中的空格和换行
+_OCR_ERROR_TABLE = str.maketrans("", "", " \n")
+# preprocess 中判断是否需要还原各类重复符号的条件
+_REPEAT_MARK_RE = re.compile(r"[々〻ゝヽヾゞ〳〴／]")
+_NEED_REPEATED_SINGLE_SIGN_RE = re.compile(r"(\w)([々〻ゝヽ])")
+_NEED_REPEATED_SINGLE_DAKU_SIGN_RE = re.compile(r"^(.*?)(\w)([ヾゞ])(.*?)$")
+_NEED_REPEATED_DOUBLE_SIGN_RE = re.compile(r"^(\w{2})(〳〵|／＼)(.*?)$")
+_NEED_REPEATED_DOUBLE_DAKU_SIGN_RE = re.compile(r"^(.*?)(〴〵|／″＼)(.*?)$")
+
 
 def del_word_ruby(input_text: str) -> str:
     """Removes ruby character from the input text.
@@ -15,27 +82,10 @@ def del_word_ruby(input_text: str) -> str:
         The text with converted ruby character.
     """
     # 通过检查注音符号前的字符串是否是汉字，判断是否是在为汉字注音
-    # 汉字的 Unicode 编码范围请参考下面的链接
-    # https://www.unicode.org/charts/
-    reg = re.compile(
-        r"""(?P<cjk_unified_ideographs>[一-鿿])|
- {12}(?P<extension_a>[㐀-䶿])|
- {12}(?P<extension_b>[ 0-⩭F])|
- {12}(?P<extension_c>[⩰0-⭳8])|
- {12}(?P<extension_d>[⭴0-⮁D])|
- {12}(?P<extension_e>[⮂0-⳪1])|
- {12}(?P<extension_f>[Ⳬ0-⺾0])|
- {12}(?P<extension_g>[　0-⌓4A])|
- {12}(?P<extension_h>[ㄵ0-㈺F])|
- {12}(?P<extension_i>[⺿0-⻥F])([(（《])(.*?)
-"""
-    )
-    if reg.search(input_text) is None:
+    if _WORD_RUBY_KANJI_RE.search(input_text) is None:
         return input_text
 
-    reg = re.compile(r"([(（《])[぀-ゟ]*?([)）》])")
-    replacement = r""
-    output_text = re.sub(reg, replacement, input_text)
+    output_text = _WORD_RUBY_RE.sub("", input_text)
     return output_text
 
 
@@ -49,18 +99,51 @@ def convert_kata_to_hira(input_text: str) -> str:
     Returns:
         The text with katakana converted to hiragana.
     """
-    output_text = ""
-    for gana in input_text:
-        # 关于取值范围，请阅读下面的链接
-        # Read url for why the condition is 12448 and 12534
-        # https://www.unicode.org/charts/PDF/U30A0.pdf
-        gana_code = int(ord(gana))
-        if 12448 <= gana_code <= 12534:
-            hira = chr(gana_code - 96)
-            output_text = output_text + hira
-        else:
-            output_text = output_text + gana
-    return output_text
+    return input_text.translate(_KATA_TO_HIRA_TABLE)
+
+
+def convert_hira_to_kata(input_text: str) -> str:
+    """Convert hiragana to katakana in the given text.
+        将平假名转为片假名
+
+    Args:
+        input_text: A String containing the hiragana.
+
+    Returns:
+        The text with hiragana converted to katakana.
+    """
+    return input_text.translate(_HIRA_TO_KATA_TABLE)
+
+
+def convert_half_to_full_kata(input_text: str) -> str:
+    """Convert half-width katakana to full-width katakana in the given text.
+        将半角片假名转为全角片假名，半角浊音符号会与前一个假名合并，例：ｶﾞ→ガ
+        与 convert_half_full_width 不同，不会改变其他字符
+
+    Args:
+        input_text: A String containing the half-width katakana.
+
+    Returns:
+        The text with half-width katakana converted to full-width katakana.
+    """
+    if _HALF_VOICED_KATA_RE.search(input_text) is not None:
+        input_text = _HALF_VOICED_KATA_RE.sub(
+            lambda match: _HALF_VOICED_KATA_DICT[match.group()], input_text
+        )
+    return input_text.translate(_HALF_TO_FULL_KATA_TABLE)
+
+
+def convert_full_to_half_kata(input_text: str) -> str:
+    """Convert full-width katakana to half-width katakana in the given text.
+        将全角片假名转为半角片假名，浊音假名会拆分为两个字符，例：ガ→ｶﾞ
+
+    Args:
+        input_text: A String containing the full-width katakana.
+
+    Returns:
+        The text with full-width katakana converted to half-width katakana.
+    """
+    return input_text.translate(_FULL_TO_HALF_KATA_TABLE)
 
 
 def convert_repeated_single_sign(input_text: str) -> str:
@@ -73,8 +156,7 @@ def convert_repeated_single_sign(input_text: str) -> str:
     Returns:
         The text with converted repeated single sign.
     """
-    reg = r"^(.*?)(々|〻|ゝ|ヽ)(.*?)$"
-    match = re.match(reg, input_text)
+    match = _REPEATED_SINGLE_SIGN_RE.match(input_text)
     if not match:
         return input_text
 
@@ -105,9 +187,7 @@ def convert_repeated_single_daku_sign(input_text: str) -> str:
         The text with converted repeated single daku sign.
             已移除单字符浊音符号的字符串
     """
-    # TODO 考虑将下面的正则表达式使用recompile 模块提取到模块初始化位置
-    reg = r"^(?P<pre_sign_text>.*?)(?P<daku_pre_char>\w{1})(ヾ|ゞ)(?P<post_sign_text>.*?)$"
-    match = re.match(reg, input_text)
+    match = _REPEATED_SINGLE_DAKU_SIGN_RE.match(input_text)
     if not match:
         return input_text
 
@@ -134,7 +214,7 @@ def convert_repeated_double_sign(input_text: str) -> str:
         The text with converted repeated double sign.
             已移除多字符重复符号的字符串
     """
-    match = re.match(r"^(?P<pre_sign_text>.+)(〳〵|／＼|〱)$", input_text)
+    match = _REPEATED_DOUBLE_SIGN_RE.match(input_text)
 
     if not match:
         return input_text
@@ -158,9 +238,7 @@ def convert_repeated_double_daku_sign(input_text: str) -> str:
         The text with converted repeated double daku sign.
             已移除多字符浊音符号的字符串
     """
-    match = re.match(
-        r"^(?P<pre_sign_text>.*?)(〴〵|／″＼)(?P<post_sign_text>.*?)$", input_text
-    )
+    match = _REPEATED_DOUBLE_DAKU_SIGN_RE.match(input_text)
 
     if not match:
         return input_text
@@ -170,12 +248,12 @@ def convert_repeated_double_daku_sign(input_text: str) -> str:
     # 匹配多字符浊音符号后的字符串
     post_input_text = match.group("post_sign_text")
 
-    if re.search(r"[^\u3040-\u30ff]", pre_input_text) is not None:
+    if _NOT_KANA_RE.search(pre_input_text) is not None:
         # 如果多字符浊音符号前的字符串中不止汉字
         # 比如像「代わる〴〵」这样，同时含有汉字和假名
         # 那么拼接多字符浊音符号前的部分然后输出拼接后的字符串，例：「代わる代わる」
         output_text = pre_input_text + pre_input_text + post_input_text
-    elif re.search(r"([\u3040-\u30ff])(.*?)", pre_input_text) is not None:
+    elif _KANA_RE.search(pre_input_text) is not None:
         # 提取多字符浊音符号前的字符串的第一个假名并计算出对应的浊音假名
         # 拼接后输出拼接后的字符串
         daku_character = chr(int(ord(pre_input_text[0])) + 1)
@@ -198,9 +276,7 @@ def del_ocr_error(input_text: str) -> str:
     Returns:
         A processed string with spaces and newlines removed.
     """
-    input_text = input_text.replace(" ", "")
-    input_text = input_text.replace("\n", "")
-    output_text = input_text.replace("\r\n", "")
+    output_text = input_text.translate(_OCR_ERROR_TABLE)
     return output_text
 
 
@@ -238,12 +314,15 @@ def preprocess(input_text: str, need_half2full: bool = True) -> str:
     if "(" in input_text:
         input_text = del_word_ruby(input_text)
 
-    if re.search(r"(\w)([々〻ゝヽ])", input_text) is not None:
+    # 绝大多数输入不含重复符号，只需扫描一次即可跳过下面所有的判断
+    if _REPEAT_MARK_RE.search(input_text) is None:
+        return input_text
+    if _NEED_REPEATED_SINGLE_SIGN_RE.search(input_text) is not None:
         input_text = convert_repeated_single_sign(input_text)
-    if re.search(r"^(.*?)(\w)([ヾゞ])(.*?)$", input_text) is not None:
+    if _NEED_REPEATED_SINGLE_DAKU_SIGN_RE.search(input_text) is not None:
         input_text = convert_repeated_single_daku_sign(input_text)
-    if re.search(r"^(\w{2})(〳〵|／＼)(.*?)$", input_text) is not None:
+    if _NEED_REPEATED_DOUBLE_SIGN_RE.search(input_text) is not None:
         input_text = convert_repeated_double_sign(input_text)
-    if re.search(r"^(.*?)(〴〵|／″＼)(.*?)$", input_text) is not None:
+    if _NEED_REPEATED_DOUBLE_DAKU_SIGN_RE.search(input_text) is not None:
         input_text = convert_repeated_double_daku_sign(input_text)
     return input_text
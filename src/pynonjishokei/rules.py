@@ -0,0 +1,300 @@
+"""Reloadable rule registry.
+
+规则注册表：所有规则组成一个不可变的快照，重新加载时整体替换，读取时无需加锁
+"""
+
+import itertools
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# pylint: disable=E0402
+from .deinflection import DeinflectionAutomaton  # type: ignore
+from .orthography_index import OrthographyIndex  # type: ignore
+from .orthography_index import load_orthography_index  # type: ignore
+
+CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
+RULE_PATH = os.path.join(CURRENT_PATH, "rule")
+ORTHOGRAPHY_RULE_PATH = os.path.join(RULE_PATH, "index.json")
+# index.json 会被编译为二进制索引，查询时通过 mmap 读取，不再在导入时构建字典
+ORTHOGRAPHY_INDEX_PATH = os.path.join(RULE_PATH, "index.bin")
+CONJUGATE_RULE_PATH = os.path.join(RULE_PATH, "conjugate_rule.json")
+SPECIAL_RULE_PATH = os.path.join(RULE_PATH, "special_rule.json")
+# 所有注册表共用的快照编号，不同注册表的快照也不会得到相同的编号
+_snapshot_serials = itertools.count()
+
+
+def read_rule_file(rule_file: str) -> Dict[str, list[str]]:
+    """read json file
+        加载规则文件
+
+    Args:
+        rule_file: input file path
+
+    Returns:
+        json file content
+    """
+    with open(rule_file, "r", encoding="utf-8") as f:
+        return json.loads(f.read())
+
+
+def read_user_rule_file(
+    rule_file: str,
+) -> Tuple[Dict[str, list[str]], Dict[str, list[str]]]:
+    """Read a user rule file.
+        加载用户自定义的规则文件
+
+    The file has the same rules as conjugate_rule.json and special_rule.json,
+    grouped under two optional keys::
+
+        {"conjugate": {"ちゃった": ["る"]}, "special": {"おる": ["いる"]}}
+
+    Args:
+        rule_file: Path of the user rule file.
+
+    Returns:
+        The conjugate rules and the special rules of the file.
+
+    Raises:
+        ValueError: The file does not follow the format above.
+    """
+    user_rule_dict = read_rule_file(rule_file)
+    if not isinstance(user_rule_dict, dict) or not set(user_rule_dict) <= {
+        "conjugate",
+        "special",
+    }:
+        raise ValueError(
+            f"{rule_file}: a user rule file only contains \"conjugate\" and \"special\""
+        )
+    rule_dicts = []
+    for rule_type in ("conjugate", "special"):
+        rule_dict = user_rule_dict.get(rule_type, {})
+        if not isinstance(rule_dict, dict) or not all(
+            isinstance(key, str)
+            and key != ""
+            and isinstance(outputs, list)
+            and all(isinstance(output, str) for output in outputs)
+            for key, outputs in rule_dict.items()
+        ):
+            raise ValueError(
+                f"{rule_file}: \"{rule_type}\" must map strings to lists of strings"
+            )
+        rule_dicts.append(rule_dict)
+    return rule_dicts[0], rule_dicts[1]
+
+
+def merge_rule_dicts(
+    base_rule_dict: Dict[str, list[str]], *rule_dicts: Dict[str, list[str]]
+) -> Dict[str, list[str]]:
+    """Merge rule layers into one dict.
+        合并多层规则：同一个键的推导结果按层的顺序合并，并去除重复值
+
+    Args:
+        base_rule_dict: The rules shipped with the package.
+        *rule_dicts: The user rules, in the order they are loaded.
+
+    Returns:
+        A new dict, the inputs are not modified.
+    """
+    merged_rule_dict = dict(base_rule_dict)
+    for rule_dict in rule_dicts:
+        for key, outputs in rule_dict.items():
+            merged_rule_dict[key] = list(
+                dict.fromkeys([*merged_rule_dict.get(key, ()), *outputs])
+            )
+    return merged_rule_dict
+
+
+class RuleSnapshot(NamedTuple):
+    """All the rules used by one lookup.
+    一次查询使用的所有规则，创建后不再修改
+
+    generation increases with every reload of the same registry. serial is
+    unique among the snapshots of all registries, so results cached in
+    module-level caches are keyed on it.
+    """
+
+    orthography_index: OrthographyIndex
+    conjugate_rule_dict: Dict[str, list[str]]
+    special_rule_dict: Dict[str, list[str]]
+    deinflection_automaton: DeinflectionAutomaton
+    generation: int
+    serial: int
+
+
+class RuleRegistry:
+    """Holds the current RuleSnapshot and swaps it atomically on reload.
+    保存当前的规则快照，重新加载时整体替换
+
+    Lookups read the snapshot attribute once and use it until they return,
+    so a reload never exposes half-loaded rules and the read path takes no
+    lock. Reloads are serialized and build the new snapshot before the swap.
+    The rules are loaded when the snapshot is first read, not when the
+    registry is created.
+
+    Args:
+        orthography_rule_path: Path of rule/index.json.
+        orthography_index_path: Path of the compiled index.
+        conjugate_rule_path: Path of rule/conjugate_rule.json.
+        special_rule_path: Path of rule/special_rule.json.
+        user_rule_paths: User rule files, see read_user_rule_file, merged into
+            the shipped rules in this order.
+    """
+
+    def __init__(
+        self,
+        orthography_rule_path: str = ORTHOGRAPHY_RULE_PATH,
+        orthography_index_path: str = ORTHOGRAPHY_INDEX_PATH,
+        conjugate_rule_path: str = CONJUGATE_RULE_PATH,
+        special_rule_path: str = SPECIAL_RULE_PATH,
+        user_rule_paths: Sequence[str] = (),
+    ):
+        self.orthography_rule_path = orthography_rule_path
+        self.orthography_index_path = orthography_index_path
+        self.conjugate_rule_path = conjugate_rule_path
+        self.special_rule_path = special_rule_path
+        self.user_rule_paths = tuple(user_rule_paths)
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[RuleSnapshot], None]] = []
+        self._snapshot: Optional[RuleSnapshot] = None
+
+    @property
+    def snapshot(self) -> RuleSnapshot:
+        """The current rules, loaded on first access.
+        当前的规则快照，第一次读取时才加载规则文件
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._reload_lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load(0)
+                snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def paths(self) -> Dict[str, Any]:
+        """The current rule paths, as keyword arguments of reload.
+        当前使用的规则文件路径，可以直接传给 reload，例如在子进程中加载同样的规则
+        """
+        return {
+            "orthography_rule_path": self.orthography_rule_path,
+            "orthography_index_path": self.orthography_index_path,
+            "conjugate_rule_path": self.conjugate_rule_path,
+            "special_rule_path": self.special_rule_path,
+            "user_rule_paths": self.user_rule_paths,
+        }
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the rules have been loaded.
+        规则文件是否已经加载
+        """
+        return self._snapshot is not None
+
+    def _load(
+        self, generation: int, orthography_index: Optional[OrthographyIndex] = None
+    ) -> RuleSnapshot:
+        if orthography_index is None:
+            orthography_index = load_orthography_index(
+                self.orthography_rule_path, self.orthography_index_path
+            )
+        conjugate_rule_dict = read_rule_file(self.conjugate_rule_path)
+        special_rule_dict = read_rule_file(self.special_rule_path)
+        if self.user_rule_paths:
+            user_rule_dicts = [
+                read_user_rule_file(user_rule_path)
+                for user_rule_path in self.user_rule_paths
+            ]
+            conjugate_rule_dict = merge_rule_dicts(
+                conjugate_rule_dict, *(conjugate for conjugate, _ in user_rule_dicts)
+            )
+            special_rule_dict = merge_rule_dicts(
+                special_rule_dict, *(special for _, special in user_rule_dicts)
+            )
+        # 将所有规则层预先编译为同一棵倒序前缀树，查询的耗时与规则层数无关
+        deinflection_automaton = DeinflectionAutomaton(
+            conjugate_rule_dict, special_rule_dict
+        )
+        return RuleSnapshot(
+            orthography_index,
+            conjugate_rule_dict,
+            special_rule_dict,
+            deinflection_automaton,
+            generation,
+            next(_snapshot_serials),
+        )
+
+    def add_listener(self, listener: Callable[[RuleSnapshot], None]) -> None:
+        """Call a function with the new snapshot after every reload.
+            注册重新加载后的回调，例如清空依赖旧规则的缓存
+
+        Args:
+            listener: Called with the new snapshot.
+        """
+        self._listeners.append(listener)
+
+    def reload(
+        self,
+        orthography_rule_path: Optional[str] = None,
+        orthography_index_path: Optional[str] = None,
+        conjugate_rule_path: Optional[str] = None,
+        special_rule_path: Optional[str] = None,
+        orthography_index: Optional[OrthographyIndex] = None,
+        user_rule_paths: Optional[Sequence[str]] = None,
+    ) -> RuleSnapshot:
+        """Load the rules from disk and swap them in.
+            重新加载规则，加载完成后整体替换当前快照
+
+        Paths that are not given keep their previous value.
+
+        Args:
+            orthography_rule_path: New path of rule/index.json.
+            orthography_index_path: New path of the compiled index.
+            conjugate_rule_path: New path of rule/conjugate_rule.json.
+            special_rule_path: New path of rule/special_rule.json.
+            orthography_index: An already loaded index used instead of
+                loading one from the paths, e.g. a newly compiled one.
+            user_rule_paths: New user rule files, an empty list removes them.
+
+        Returns:
+            The new snapshot.
+        """
+        with self._reload_lock:
+            previous_paths = (
+                self.orthography_rule_path,
+                self.orthography_index_path,
+                self.conjugate_rule_path,
+                self.special_rule_path,
+                self.user_rule_paths,
+            )
+            if orthography_rule_path is not None:
+                self.orthography_rule_path = orthography_rule_path
+            if orthography_index_path is not None:
+                self.orthography_index_path = orthography_index_path
+            if conjugate_rule_path is not None:
+                self.conjugate_rule_path = conjugate_rule_path
+            if special_rule_path is not None:
+                self.special_rule_path = special_rule_path
+            if user_rule_paths is not None:
+                self.user_rule_paths = tuple(user_rule_paths)
+            try:
+                generation = (
+                    0 if self._snapshot is None else self._snapshot.generation + 1
+                )
+                snapshot = self._load(generation, orthography_index)
+            except Exception:
+                # 加载失败时继续使用原来的规则和路径
+                (
+                    self.orthography_rule_path,
+                    self.orthography_index_path,
+                    self.conjugate_rule_path,
+                    self.special_rule_path,
+                    self.user_rule_paths,
+                ) = previous_paths
+                raise
+            # 替换属性是原子操作，正在进行的查询继续使用旧快照
+            self._snapshot = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+        return snapshot
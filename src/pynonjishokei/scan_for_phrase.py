@@ -1,29 +1,102 @@
-import logging
-import sys
-import time
+import os
+import threading
+from typing import Iterable, Iterator
 
+from . import instrumentation
+from .db.query_phrase import DB_PATH
+from .db.query_phrase import invalidate_connections
 from .db.query_phrase import query_phrase
+from .db.query_phrase import query_phrase_words
 
-from .main import scan_input_string
+from .main import RankedCandidates
+from .main import rank_scanned_prefix
+from .main import iter_scanned_prefixes
+from .main import rule_registry
+from .rules import RuleSnapshot
+from .preprocess import preprocess
 
-logging.basicConfig(
-    handlers=[
-        logging.FileHandler(
-            f"{time.strftime('%Y-%m-%d', time.localtime())}.log", encoding="utf-8"
-        ),
-        logging.StreamHandler(sys.stderr),
-    ],
-    level=logging.DEBUG,
-    format="%(asctime)s %(filename)s %(levelname)s %(message)s",
-    datefmt="%a %d %b %Y %H:%M:%S",
-)
-# TODO 应该从数据库中自动读取 yomi 和 kanji 2列，生成下面的集合
-phrase_words_set = {"うそ", "つく", "嘘", "付く"}
+# 组成词组的单词集合，在首次使用时从数据库读取，数据库文件变化后重新读取
+_phrase_words_set: frozenset[str] = frozenset()
+# 读取集合时数据库文件的修改时间和大小
+_phrase_words_stamp: tuple[int, int] | None = None
+_phrase_words_lock = threading.Lock()
+
+
+def get_phrase_words_set() -> frozenset[str]:
+    """返回数据库中组成词组的所有单词，数据库文件变化时重新读取
+
+    Returns:
+        数据库中 yomi 和 kannji 列的所有值，例：{"うそ", "つく", "嘘", "付く"}
+    """
+    global _phrase_words_set, _phrase_words_stamp
+    stat = os.stat(DB_PATH)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if stamp == _phrase_words_stamp:
+        return _phrase_words_set
+    with _phrase_words_lock:
+        if stamp != _phrase_words_stamp:
+            if _phrase_words_stamp is not None:
+                # 以 immutable 模式打开的连接不会察觉数据库的变化，需要重新建立
+                # 只让旧连接失效，由各线程关闭自己的连接，以免关闭其他线程正在查询的连接
+                invalidate_connections()
+            _phrase_words_set = query_phrase_words()
+            _phrase_words_stamp = stamp
+    return _phrase_words_set
+
+
+def iter_prefix_candidates(
+    input_text: str, start_index: int, rules: RuleSnapshot, max_word_length: int
+) -> Iterator[tuple[int, RankedCandidates]]:
+    """推导从 start_index 开始的每个前缀可能对应的辞书形
+
+    Args:
+        input_text: 已经预处理过的一句话
+        start_index: 前缀的起始位置
+        rules: 扫描整句话时使用的规则快照
+        max_word_length: 组成词组的单词的最大长度
+
+    Yields:
+        前缀的结束位置和推导结果，按前缀从短到长的顺序；没有词条能延续前缀时停止
+    """
+    # 全为片假名的长前缀只会得到与自身等长的猜测，超过单词的最大长度后不可能组成词组，
+    # 不限制的话片假名句子的每个起始位置都会扫描到句末，耗时与长度的平方成正比
+    for scanned_input_text in iter_scanned_prefixes(
+        input_text[start_index:], rules, max_word_length
+    ):
+        if instrumentation.trace_enabled:
+            instrumentation.emit("phrase_scan_window", window=scanned_input_text)
+        yield start_index + len(scanned_input_text), rank_scanned_prefix(
+            scanned_input_text, rules
+        )
+
+
+def order_candidates(ranked_candidates_list: Iterable[RankedCandidates]) -> list[str]:
+    """按 scan_input_string 的顺序排列多个前缀的推导结果
+
+    Args:
+        ranked_candidates_list: 各个前缀的推导结果，按前缀从长到短的顺序
+
+    Returns:
+        更长前缀的推导结果在前，同一前缀中后推导出的结果在前，所有经过确认的结果排在未经确认的猜测之前，
+        每个结果只出现一次
+    """
+    # 利用字典的键去除重复值，同时保留第一次出现的顺序
+    confirmed_dict: dict[str, None] = {}
+    guessed_dict: dict[str, None] = {}
+    for ranked_candidates in ranked_candidates_list:
+        confirmed_dict.update(dict.fromkeys(reversed(ranked_candidates.confirmed)))
+        guessed_dict.update(dict.fromkeys(reversed(ranked_candidates.guessed)))
+    return [
+        *confirmed_dict,
+        *(candidate for candidate in guessed_dict if candidate not in confirmed_dict),
+    ]
 
 
 def longest_matching_scan(input_text: str) -> list[list[str]]:
     """用最长一致法扫描并提取出一句话中可能是词组搭配的单词
 
+    每个起始位置的前缀只推导一次，并在后索引移动时复用，扫描一句话的耗时与其长度近似成正比
+
     Args:
         input_text:可能含有词组的一句话
 
@@ -33,40 +106,82 @@ def longest_matching_scan(input_text: str) -> list[list[str]]:
     """
     # 使用二维数组保存结果
     scanned_output_list: list[list[str]] = []
-    # 切片扫描字符串时的前索引值
-    pre_scanning_index = 0
-    # 切片扫描字符串时的后索引值
-    post_scanning_index = 0
+    if input_text == "":
+        return scanned_output_list
+    phrase_words_set = get_phrase_words_set()
+    # 只有不超过最长单词长度的片段本身才可能是词组中的单词
+    max_word_length = max(map(len, phrase_words_set), default=0)
+    # 整句话只预处理一次，并使用同一份规则快照
+    input_text = preprocess(input_text)
+    rules = rule_registry.snapshot
     input_length = len(input_text)
-    while post_scanning_index <= input_length and pre_scanning_index <= input_length:
-        if post_scanning_index == input_length:
-            if pre_scanning_index == post_scanning_index:
-                # 前后索引值重合，说明已经完成扫描
-                break
-            # 后索引已到达字符串末端，接下来只移动前索引
-            pre_scanning_index += 1
-        else:
-            post_scanning_index += 1
-        # 记录当前正在扫描的字符串
-        scanning_string = input_text[pre_scanning_index:post_scanning_index]
-        logging.debug(
-            "scanning input string: %s",
-            scanning_string,
-        )
-        jishokei_scanning_list = scan_input_string(scanning_string)
 
+    def match_phrase_words(
+        candidate_list: Iterable[str], scanning_string: str
+    ) -> list[str]:
         scanned_word_list = []
-        for jishokei_string in jishokei_scanning_list:
-            if jishokei_string in phrase_words_set:
-                logging.debug("add %s to %s", jishokei_string, scanned_word_list)
+        # candidate_list 已按 scan_input_string 的顺序排列，扫描的字符串本身排在最后
+        for jishokei_string in [*candidate_list, scanning_string]:
+            if (
+                jishokei_string in phrase_words_set
+                and jishokei_string not in scanned_word_list
+            ):
+                if instrumentation.trace_enabled:
+                    instrumentation.emit("phrase_word", word=jishokei_string)
                 scanned_word_list.append(jishokei_string)
-                # 成功识别出词汇，将前索引移动到后索引所在的位置，继续移动后索引向后扫描识别剩下的字符串
-                pre_scanning_index = post_scanning_index
+        return scanned_word_list
 
+    # 切片扫描字符串时的前索引值
+    pre_scanning_index = 0
+    prefix_candidates = iter_prefix_candidates(
+        input_text, pre_scanning_index, rules, max_word_length
+    )
+    next_prefix_candidate = next(prefix_candidates, None)
+    # 移动后索引：前索引到后索引之间的片段在移动前都没有识别出单词，
+    # 所以只需检查以后索引结尾的最长前缀
+    for post_scanning_index in range(1, input_length + 1):
+        candidate_list: list[str] = []
+        if (
+            next_prefix_candidate is not None
+            and next_prefix_candidate[0] == post_scanning_index
+        ):
+            candidate_list = order_candidates([next_prefix_candidate[1]])
+            next_prefix_candidate = next(prefix_candidates, None)
+        scanning_string = ""
+        if post_scanning_index - pre_scanning_index <= max_word_length:
+            scanning_string = input_text[pre_scanning_index:post_scanning_index]
+        scanned_word_list = match_phrase_words(candidate_list, scanning_string)
+        if len(scanned_word_list) > 0:
+            if instrumentation.trace_enabled:
+                instrumentation.emit("phrase_words", words=scanned_word_list)
+            scanned_output_list.append(scanned_word_list)
+            # 成功识别出词汇，将前索引移动到后索引所在的位置，继续移动后索引向后扫描识别剩下的字符串
+            pre_scanning_index = post_scanning_index
+            prefix_candidates = iter_prefix_candidates(
+                input_text, pre_scanning_index, rules, max_word_length
+            )
+            next_prefix_candidate = next(prefix_candidates, None)
+
+    # 后索引已到达字符串末端，接下来只移动前索引，检查从前索引开始的所有前缀
+    for pre_scanning_index in range(pre_scanning_index + 1, input_length):
+        # 前缀按从短到长的顺序推导，排序时反过来
+        ranked_candidates_list = [
+            ranked_candidates
+            for _, ranked_candidates in iter_prefix_candidates(
+                input_text, pre_scanning_index, rules, max_word_length
+            )
+        ]
+        candidate_list = order_candidates(reversed(ranked_candidates_list))
+        scanning_string = ""
+        if input_length - pre_scanning_index <= max_word_length:
+            scanning_string = input_text[pre_scanning_index:]
+        scanned_word_list = match_phrase_words(candidate_list, scanning_string)
         if len(scanned_word_list) > 0:
-            # 将单次的识别结果单独保存到一个列表中
-            logging.debug("add %s to %s", scanned_word_list, scanned_output_list)
+            if instrumentation.trace_enabled:
+                instrumentation.emit("phrase_words", words=scanned_word_list)
             scanned_output_list.append(scanned_word_list)
+            # 前后索引值重合，说明已经完成扫描
+            break
     return scanned_output_list
 
 
@@ -0,0 +1,373 @@
+"""Asyncio HTTP server that keeps the rules loaded between lookups.
+
+常驻进程：规则文件只在启动时加载一次，浏览器扩展等客户端通过 HTTP 或 Unix socket 查询
+
+Endpoints (request and response bodies are JSON):
+
+    GET  /health   {"status": "ok", "pending": 0, "max_pending": 64, "workers": 4, "generation": 0}
+    POST /scan     {"text": "食べた", "max_results": 3}  -> {"result": ["食べる", ...]}
+                   {"texts": ["食べた", "行った"]}        -> {"results": [[...], [...]]}
+    POST /phrase   {"text": "嘘をつくのよ"}                -> {"result": [["嘘を付く"]]}
+                   {"texts": [...]}                       -> {"results": [...]}
+    POST /reload   reload the rule files from disk          -> {"generation": 1}
+
+Lookups run on a bounded thread pool. Every string of a request counts as
+one lookup. When a request would bring the lookups queued or running above
+max_pending, it is answered with 503 and Retry-After, and a batch larger
+than max_pending is answered with 413.
+"""
+
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .main import reload_rules
+from .main import rule_registry
+from .main import scan_input_string
+from .scan_for_phrase import get_phrase_words_set
+from .scan_for_phrase import scan_for_phrase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 64
+# 单次批量查询的最大字符串数量和请求体的最大字节数
+MAX_BATCH_SIZE = 1000
+MAX_BODY_SIZE = 1 << 20
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    """An error answered to the client with the given status code.
+    返回给客户端的错误
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def parse_lookup(body: bytes) -> Tuple[List[str], bool, Optional[int]]:
+    """Parse the JSON body of a lookup request.
+        解析查询请求的请求体
+
+    Args:
+        body: {"text": str} or {"texts": [str, ...]}, optionally with "max_results".
+
+    Returns:
+        The strings to look up, whether the request is batched and max_results.
+
+    Raises:
+        HTTPError: The body is not a valid lookup request.
+    """
+    try:
+        payload = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPError(400, "request body is not valid JSON") from e
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "request body must be a JSON object")
+    if "texts" in payload:
+        texts = payload["texts"]
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise HTTPError(400, '"texts" must be a list of strings')
+        if len(texts) > MAX_BATCH_SIZE:
+            raise HTTPError(413, f"at most {MAX_BATCH_SIZE} texts per request")
+        batched = True
+    elif isinstance(payload.get("text"), str):
+        texts = [payload["text"]]
+        batched = False
+    else:
+        raise HTTPError(400, 'request body must contain "text" or "texts"')
+    max_results = payload.get("max_results")
+    if max_results is not None and (
+        not isinstance(max_results, int) or isinstance(max_results, bool) or max_results < 0
+    ):
+        raise HTTPError(400, '"max_results" must be a non-negative integer')
+    return texts, batched, max_results
+
+
+def lookup_scan(texts: List[str], max_results: Optional[int]) -> List[list]:
+    """Runs scan_input_string on every string.
+    对每个字符串调用 scan_input_string
+    """
+    return [scan_input_string(input_text, max_results) for input_text in texts]
+
+
+def lookup_phrase(texts: List[str], _max_results: Optional[int]) -> List[list]:
+    """Runs scan_for_phrase on every string.
+    对每个字符串调用 scan_for_phrase
+    """
+    return [
+        [list(phrase) for phrase in scan_for_phrase(input_text)] for input_text in texts
+    ]
+
+
+def warm_up() -> None:
+    """Loads the rules and the phrase words before the first lookup.
+    预先加载规则和词组单词集合
+    """
+    rule_registry.snapshot  # pylint: disable=W0104
+    get_phrase_words_set()
+
+
+class LookupServer:
+    """Serves lookups over HTTP from one warm process.
+    在同一个进程中处理所有查询，避免每次请求都重新导入和加载规则
+
+    Args:
+        workers: The number of threads running the lookups.
+        max_pending: The maximum number of lookups queued or running at once,
+            each string of a batch counting as one lookup.
+    """
+
+    def __init__(
+        self, workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        # 正在执行或排队等待的查询数量，批量查询按字符串数量计算，只在事件循环线程中修改
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pynonjishokei"
+        )
+        self._routes: Dict[str, Callable[[List[str], Optional[int]], List[list]]] = {
+            "/scan": lookup_scan,
+            "/phrase": lookup_phrase,
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: Optional[str] = None,
+    ) -> asyncio.AbstractServer:
+        """Warm up the rules and the phrase database, then start listening.
+            预先加载规则和词组数据库，然后开始监听
+
+        Args:
+            host: The address to listen on.
+            port: The TCP port, 0 picks a free port.
+            unix_socket: Listen on this Unix socket path instead of TCP.
+
+        Returns:
+            The listening server.
+        """
+        # 规则文件在第一次查询时才加载，这里预先加载规则和词组单词集合，避免第一个请求承担这部分耗时
+        await asyncio.get_running_loop().run_in_executor(self._executor, warm_up)
+        if unix_socket is not None:
+            self._server = await asyncio.start_unix_server(
+                self.handle_connection, path=unix_socket
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self.handle_connection, host=host, port=port
+            )
+        return self._server
+
+    async def close(self) -> None:
+        """Stop listening and shut the thread pool down.
+        停止监听并关闭线程池
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._executor.shutdown(wait=True)
+
+    def health(self) -> Dict[str, Any]:
+        """Report the load of the server.
+            返回服务器的负载情况
+
+        Returns:
+            The status, the number of pending lookups and the limits.
+        """
+        return {
+            "status": "ok",
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "workers": self.workers,
+            "generation": rule_registry.snapshot.generation,
+        }
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """Route one request.
+            处理一个请求
+
+        Args:
+            method: The HTTP method.
+            path: The request path without the query string.
+            body: The request body.
+
+        Returns:
+            The status code and the JSON payload of the response.
+        """
+        if path == "/health":
+            if method not in ("GET", "HEAD"):
+                raise HTTPError(405, "use GET")
+            return 200, self.health()
+        if path == "/reload":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            # 正在进行的查询继续使用旧规则，加载完成后新的查询立即使用新规则
+            snapshot = await asyncio.get_running_loop().run_in_executor(
+                self._executor, reload_rules
+            )
+            return 200, {"generation": snapshot.generation}
+        lookup = self._routes.get(path)
+        if lookup is None:
+            raise HTTPError(404, f"unknown path {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        texts, batched, max_results = parse_lookup(body)
+        # 背压：已有足够多的查询在排队时直接拒绝，而不是无限制地堆积在线程池的队列中，
+        # 批量查询中的每个字符串都计为一次查询，否则一个批次就能绕过限制
+        if len(texts) > self.max_pending:
+            raise HTTPError(413, f"at most {self.max_pending} texts per request")
+        if self.pending + len(texts) > self.max_pending:
+            raise HTTPError(503, "too many pending lookups")
+        self.pending += len(texts)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, lookup, texts, max_results
+            )
+        finally:
+            self.pending -= len(texts)
+        if batched:
+            return 200, {"results": results}
+        return 200, {"result": results[0]}
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve the HTTP/1.1 requests of one connection, keeping it alive.
+        处理一个连接上的所有 HTTP/1.1 请求
+        """
+        try:
+            while True:
+                keep_alive = True
+                head_only = False
+                try:
+                    try:
+                        request_line = await reader.readline()
+                        if not request_line:
+                            break
+                        headers: Dict[str, str] = {}
+                        while True:
+                            header_line = await reader.readline()
+                            if header_line in (b"\r\n", b"\n", b""):
+                                break
+                            name, _, value = header_line.decode("latin-1").partition(":")
+                            headers[name.strip().lower()] = value.strip()
+                        method, target, version = request_line.decode("latin-1").split()
+                        content_length = int(headers.get("content-length", "0"))
+                    except (asyncio.LimitOverrunError, ValueError) as e:
+                        # 超长的请求行或头部（StreamReader 超出限制时抛出 ValueError）和无法解析的请求
+                        keep_alive = False
+                        raise HTTPError(400, "malformed request") from e
+                    # HEAD 请求的响应只有头部，否则保持连接时客户端会把响应体当作下一个响应
+                    head_only = method == "HEAD"
+                    keep_alive = (
+                        version == "HTTP/1.1"
+                        and headers.get("connection", "").lower() != "close"
+                    )
+                    if content_length < 0:
+                        keep_alive = False
+                        raise HTTPError(400, "invalid Content-Length")
+                    if content_length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise HTTPError(413, "request body is too large")
+                    body = await reader.readexactly(content_length)
+                    try:
+                        status, payload = await self.dispatch(
+                            method, target.split("?", 1)[0], body
+                        )
+                    except HTTPError:
+                        raise
+                    except Exception:  # pylint: disable=W0718
+                        # 查询中的任何异常都返回 500，而不是直接断开连接
+                        logger.exception("lookup failed: %s %s", method, target)
+                        status, payload = 500, {"error": "internal server error"}
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                self._write_response(writer, status, payload, keep_alive, head_only)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Any,
+        keep_alive: bool,
+        head_only: bool = False,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        head = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+        # Content-Length 仍是 GET 请求的响应体长度
+        writer.write(head if head_only else head + body)
+
+
+async def _serve_forever(
+    host: str, port: int, unix_socket: Optional[str], workers: int, max_pending: int
+) -> None:
+    lookup_server = LookupServer(workers, max_pending)
+    server = await lookup_server.start(host, port, unix_socket)
+    try:
+        await server.serve_forever()
+    finally:
+        await lookup_server.close()
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_socket: Optional[str] = None,
+    workers: int = DEFAULT_WORKERS,
+    max_pending: int = DEFAULT_MAX_PENDING,
+) -> None:
+    """Run the server until interrupted.
+        启动服务器，直到按下 Ctrl+C
+
+    Args:
+        host: The address to listen on.
+        port: The TCP port.
+        unix_socket: Listen on this Unix socket path instead of TCP.
+        workers: The number of threads running the lookups.
+        max_pending: The maximum number of lookups queued or running at once.
+    """
+    try:
+        asyncio.run(_serve_forever(host, port, unix_socket, workers, max_pending))
+    except KeyboardInterrupt:
+        pass
@@ -2,13 +2,11 @@
 
 import logging
 import os
-import re
 import sys
 import time
-from textwrap import dedent
 
 # pylint: disable=E0402
-from src.pynonjishokei.main import scan_input_string  # type: ignore
+from src.pynonjishokei.evaluate import evaluate_file  # type: ignore
 
 
 def init_logging(logging_level: int = logging.DEBUG):
@@ -32,86 +30,30 @@ def init_logging(logging_level: int = logging.DEBUG):
     logging.disable(logging_level)
 
 
-def test_convert_conjugate(test_file: str, converted_file: str):
-    """Covers all collections of pynonjishokei
-        覆盖所有收集的非辞書型
+def test_accuracy(test_file: str, review_file: str) -> dict:
+    """Covers all collections of pynonjishokei in one streaming pass
+        覆盖所有收集的非辞書型，逐行累计评估结果，无需保存中间文件
 
     Args:
         test_file (str): Includes all pynonjishokei file test paths.
-        converted_file (str): Path where test results are saved.
-    """
-    with open(test_file, "r", encoding="utf-8") as f, open(
-        converted_file, "w", encoding="utf-8"
-    ) as s:
-        done_line_count = 0
-        all_line_count = len(f.readlines())
-        f.seek(0)
-        for line in f.readlines():
-            line = line.replace("\n", "")
-            input_text = line.partition(":")[0]
-            result_text = ",".join(scan_input_string(input_text))
-            s.write(result_text + " " + line + "\n")
-            done_line_count += 1
-            progress_percent = (done_line_count / all_line_count) * 100
-            logging.info("progress percent: %s", progress_percent)
-
-
-def cal_accuracy(converted_result_file: str, accuracy_result_file: str) -> str:
-    """Calculate the ratio of derivation results to correct answers.
-        计算推导结果与正确答案的比例
-
-    Args:
-        converted_result_file (str): Includes all converted result file test paths.
-        accuracy_result_file (str): Path where calculate results are saved.
+        review_file (str): Path where the wrong results are saved.
 
     Returns:
-        str: The ratio of derivation results to correct answers.
+        dict: Accuracy, recall@k, mean rank and per-rule errors.
     """
-    reg = re.compile(
-        r"(?P<converted_jishokei>.*?) (?P<pynonjishokei>.*?):(?P<jishokei>.*?)\n"
-    )
-    true_count = 0
-    false_count = 0
-    with open(converted_result_file, "r", encoding="utf-8") as f, open(
-        accuracy_result_file, "w", encoding="utf-8"
-    ) as s:
-        for line in f.readlines():
-            match = re.search(reg, line)
-            if not match:
-                logging.debug("the line: %s is not match", line)
-                s.write("False\n")
-                false_count += 1
-                continue
-            converted_result_list = match.group("converted_jishokei").split(",")
-            result_template = dedent(
-                f"""converted_jishokei<{match.group('converted_jishokei')}>
-                    pynonjishokei<{match.group('pynonjishokei')}>
-                    jishokei<{match.group("jishokei")}>"""
-            )
-            if match.group("jishokei") not in converted_result_list:
-                false_count += 1
-                logging.debug("the converted jishokei: %s is false", line)
-                s.write(f"False {result_template.strip()}\n")
-            else:
-                true_count += 1
-                # s.write(f"True {result_template.strip()}\n")
-        return str(round((true_count / (true_count + false_count)) * 100, 3)) + "%"
+    return evaluate_file(test_file, review_path=review_file)
 
 
 init_logging()
 CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
 
-STAR_TIME = time.perf_counter()
-test_convert_conjugate(
-    os.path.join(CURRENT_PATH, "temp.txt"), os.path.join(CURRENT_PATH, "save.txt")
+REPORT = test_accuracy(
+    os.path.join(CURRENT_PATH, "temp.txt"), os.path.join(CURRENT_PATH, "review_v3.txt")
 )
-END_TIME = time.perf_counter()
 logging.info(
     "The time required for this test :%s millisecond",
-    str(round((END_TIME - STAR_TIME) * 1000, 3)),
-)
-
-ACCURACY = cal_accuracy(
-    os.path.join(CURRENT_PATH, "save.txt"), os.path.join(CURRENT_PATH, "review_v3.txt")
+    str(round(REPORT["seconds"] * 1000, 3)),
 )
-logging.info("Accuracy of this algorithm: %s ", ACCURACY)
+logging.info("Accuracy of this algorithm: %s%% ", round(REPORT["accuracy"] * 100, 3))
+logging.info("Recall@k: %s, mean rank: %s", REPORT["recall_at"], REPORT["mean_rank"])
+logging.info("Rules with the most errors: %s", REPORT["rule_errors"])
@@ -0,0 +1,71 @@
+""" db/build_db.py 单元测试"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.pynonjishokei.db.build_db import build_db
+from src.pynonjishokei.db.build_db import rebuild_db
+from src.pynonjishokei.db.query_phrase import build_phrase_query
+
+rows = [
+    ("嘘を付く", "嘘", "付く", "うそ", "つく"),
+    ("気を付ける", "気", "付ける", "き", "つける"),
+]
+
+
+class TestBuildDb(unittest.TestCase):
+    def test_build_db(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "phrases.db")
+            build_db(rows * 500, db_path)
+            conn = sqlite3.connect(db_path)
+            try:
+                for phrase_word_list in (
+                    [["うそ"], ["つく"]],
+                    [["嘘"], ["つく"]],
+                    [["うそ"], ["付く"]],
+                    [["嘘"], ["付く"]],
+                ):
+                    with self.subTest(phrase_word_list=phrase_word_list):
+                        statement, params = build_phrase_query(phrase_word_list)
+                        self.assertEqual(
+                            [("嘘を付く",)] * 500,
+                            conn.execute(statement, params).fetchall(),
+                        )
+                        # 查询应使用覆盖索引，而不是扫描全表
+                        query_plan = conn.execute(
+                            "EXPLAIN QUERY PLAN " + statement, params
+                        ).fetchall()
+                        self.assertIn("COVERING INDEX", query_plan[0][-1])
+            finally:
+                conn.close()
+
+    def test_rebuild_db(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "phrases.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                "CREATE TABLE kannyouku (dict_index TEXT NOT NULL"
+                ", kannji01 TEXT, kannji02 INTEGER, yomi01 TEXT, yomi02 TEXT)"
+            )
+            conn.executemany("INSERT INTO kannyouku VALUES (?, ?, ?, ?, ?)", rows)
+            conn.commit()
+            conn.close()
+
+            rebuild_db(db_path)
+            conn = sqlite3.connect(db_path)
+            try:
+                self.assertEqual(rows, conn.execute("SELECT * FROM kannyouku").fetchall())
+                column_types = {
+                    column[1]: column[2]
+                    for column in conn.execute("PRAGMA table_info(kannyouku)")
+                }
+                self.assertEqual("TEXT", column_types["kannji02"])
+            finally:
+                conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+""" cache.py 单元测试"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.pynonjishokei.cache import LRUCache
+from src.pynonjishokei.main import cache_info
+from src.pynonjishokei.main import clear_cache
+from src.pynonjishokei.main import configure_cache
+from src.pynonjishokei.main import convert_nonjishokei
+from src.pynonjishokei.main import scan_input_string
+from src.pynonjishokei.rules import RuleRegistry
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache.put("した", ("する",))
+        cache.put("して", ("する",))
+        self.assertEqual(("する",), cache.get("した"))
+        # 最久未使用的 して 被淘汰
+        cache.put("言った", ("言う",))
+        self.assertIsNone(cache.get("して"))
+        self.assertEqual(("言う",), cache.get("言った"))
+        info = cache.info()
+        self.assertEqual((2, 1, 1, 2, 2), tuple(info))
+
+    def test_resize_and_clear(self):
+        cache = LRUCache(3)
+        for key in "abc":
+            cache.put(key, (key,))
+        cache.resize(1)
+        self.assertEqual(1, cache.info().currsize)
+        self.assertEqual(2, cache.info().evictions)
+        self.assertEqual(("c",), cache.get("c"))
+
+        # 容量为 0 时不缓存任何结果
+        cache.resize(0)
+        cache.put("d", ("d",))
+        self.assertIsNone(cache.get("d"))
+
+        cache.clear()
+        self.assertEqual((0, 0, 0, 0, 0), tuple(cache.info()))
+
+
+class TestResultCache(unittest.TestCase):
+    def test_katakana_and_hiragana(self):
+        # 片假名和对应的平假名是不同的输入，不能共用同一个缓存
+        maxsize = cache_info()["convert_nonjishokei"].maxsize
+        configure_cache(0)
+        try:
+            expected = {
+                input_text: convert_nonjishokei(input_text)
+                for input_text in ("タベル", "たべる", "アツい", "あつい")
+            }
+        finally:
+            configure_cache(maxsize)
+        for first, second in (("タベル", "たべる"), ("アツい", "あつい")):
+            clear_cache()
+            self.assertEqual(expected[first], convert_nonjishokei(first))
+            self.assertEqual(expected[second], convert_nonjishokei(second))
+            clear_cache()
+            self.assertEqual(expected[second], convert_nonjishokei(second))
+            self.assertEqual(expected[first], convert_nonjishokei(first))
+
+    def test_registries(self):
+        # 不同注册表的快照即使版本号相同，也不能共用缓存中的结果
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rule_path = os.path.join(temp_dir, "slang.json")
+            with open(rule_path, "w", encoding="utf-8") as f:
+                json.dump({"conjugate": {"ちゃった": ["る"]}}, f, ensure_ascii=False)
+            user_rules = RuleRegistry(user_rule_paths=[rule_path]).snapshot
+            self.assertEqual(user_rules.generation, RuleRegistry().snapshot.generation)
+            clear_cache()
+            expected_scan = scan_input_string("食べちゃった")
+            for global_first in (True, False):
+                with self.subTest(global_first=global_first):
+                    clear_cache()
+                    if global_first:
+                        self.assertEqual([], convert_nonjishokei("食べちゃった"))
+                    self.assertIn(
+                        "食べる", convert_nonjishokei("食べちゃった", rules=user_rules)
+                    )
+                    self.assertEqual([], convert_nonjishokei("食べちゃった"))
+                    self.assertEqual(expected_scan, scan_input_string("食べちゃった"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+""" corpus.py 单元测试"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from src.pynonjishokei.corpus import imap_chunks
+from src.pynonjishokei.corpus import iter_chunks
+from src.pynonjishokei.corpus import process_corpus_file
+from src.pynonjishokei.corpus import scan_corpus
+from src.pynonjishokei.corpus import scan_lines
+from src.pynonjishokei.main import reload_rules
+from src.pynonjishokei.main import scan_input_string
+
+INPUT_TEXTS = ["食べます。", "", "Hello", "行った", "アツかった", "食べた", "行った"]
+
+
+class TestCorpus(unittest.TestCase):
+    def test_iter_chunks(self):
+        self.assertEqual([[1, 2], [3, 4], [5]], list(iter_chunks(iter(range(1, 6)), 2)))
+        self.assertEqual([], list(iter_chunks([], 2)))
+        with self.assertRaises(ValueError):
+            list(iter_chunks([1], 0))
+
+    def test_scan_corpus(self):
+        expected_result = [scan_input_string(input_text) for input_text in INPUT_TEXTS]
+        self.assertEqual(expected_result, list(scan_corpus(INPUT_TEXTS, workers=1)))
+        # 多进程的结果应按输入顺序返回
+        self.assertEqual(
+            expected_result, list(scan_corpus(INPUT_TEXTS, workers=2, chunk_size=2))
+        )
+
+    def test_process_corpus_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = os.path.join(temp_dir, "input.txt")
+            output_path = os.path.join(temp_dir, "output.txt")
+            with open(input_path, "w", encoding="utf-8") as f:
+                f.write("行った:行く\n食べた:食べる\n")
+            line_count = process_corpus_file(
+                input_path, output_path, workers=2, chunk_size=1, separator=":"
+            )
+            self.assertEqual(2, line_count)
+            with open(output_path, "r", encoding="utf-8") as f:
+                self.assertEqual(
+                    [
+                        ",".join(scan_input_string("行った")) + " 行った:行く\n",
+                        ",".join(scan_input_string("食べた")) + " 食べた:食べる\n",
+                    ],
+                    f.readlines(),
+                )
+
+    def test_process_crlf_file(self):
+        # Windows 换行符不应成为扫描的字符串或输出的一部分
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_path = os.path.join(temp_dir, "input.txt")
+            output_path = os.path.join(temp_dir, "output.txt")
+            with open(input_path, "wb") as f:
+                f.write("行った\r\n食べた\r\n".encode("utf-8"))
+            line_count = process_corpus_file(input_path, output_path, workers=1)
+            self.assertEqual(2, line_count)
+            with open(output_path, "r", encoding="utf-8") as f:
+                self.assertEqual(
+                    [
+                        ",".join(scan_input_string("行った")) + " 行った\n",
+                        ",".join(scan_input_string("食べた")) + " 食べた\n",
+                    ],
+                    f.readlines(),
+                )
+
+    def test_user_rules_in_workers(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rule_path = os.path.join(temp_dir, "dialect.json")
+            with open(rule_path, "w", encoding="utf-8") as f:
+                json.dump({"special": {"おる": ["いる"]}}, f)
+            reload_rules(user_rule_paths=[rule_path])
+            try:
+                input_texts = ["おる", "行った"]
+                expected_result = [scan_input_string(text) for text in input_texts]
+                self.assertIn("いる", expected_result[0])
+                # spawn 启动的工作进程重新导入模块，也应使用主进程的用户规则
+                chunk_results = imap_chunks(
+                    scan_lines,
+                    [input_texts[:1], input_texts[1:]],
+                    workers=2,
+                    context=multiprocessing.get_context("spawn"),
+                )
+                self.assertEqual(
+                    expected_result,
+                    [result for _, results in chunk_results for result in results],
+                )
+            finally:
+                reload_rules(user_rule_paths=[])
+
+
+if __name__ == "__main__":
+    unittest.main()
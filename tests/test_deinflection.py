@@ -0,0 +1,54 @@
+""" deinflection.py 单元测试"""
+
+import unittest
+
+from src.pynonjishokei.deinflection import DeinflectionAutomaton
+from src.pynonjishokei.main import rule_registry
+
+
+class TestDeinflectionAutomaton(unittest.TestCase):
+    def test_convert_conjugate(self):
+        automaton = DeinflectionAutomaton(
+            rule_registry.snapshot.conjugate_rule_dict,
+            rule_registry.snapshot.special_rule_dict,
+        )
+        self.assertEqual(["123る", "123い", "123"], automaton.convert_conjugate("123"))
+        self.assertIn("言う", automaton.convert_conjugate("言わ"))
+
+    def test_chain(self):
+        automaton = DeinflectionAutomaton(
+            {"た": ["る"], "させられなかった": ["る"]}, {}
+        )
+        output_list = automaton.convert_conjugate("食べさせられなかった")
+        self.assertIn("食べる", output_list)
+        self.assertIn("食べさせられなかっる", output_list)
+        self.assertEqual(len(output_list), len(set(output_list)))
+        # 不完整的词尾链不会被当作匹配
+        self.assertNotIn("食べる", automaton.convert_conjugate("食べられなかった"))
+
+    def test_explain_conjugate(self):
+        automaton = DeinflectionAutomaton(
+            {"た": ["る"], "させられなかった": ["る"]}, {}
+        )
+        explained = automaton.explain_conjugate("食べさせられなかった")
+        self.assertEqual(
+            automaton.convert_conjugate("食べさせられなかった"),
+            [candidate for candidate, _ in explained],
+        )
+        self.assertIn(("食べさせられなかった" + "る", "v1"), explained)
+        self.assertIn(("食べさせられなかっる", "た"), explained)
+        self.assertIn(("食べる", "させられなかった"), explained)
+        self.assertEqual(("食べさせられなかった", ""), explained[-1])
+
+    def test_convert_special(self):
+        automaton = DeinflectionAutomaton(
+            rule_registry.snapshot.conjugate_rule_dict,
+            rule_registry.snapshot.special_rule_dict,
+        )
+        self.assertIn("行く", automaton.convert_special("行っ"))
+        self.assertIsNone(automaton.convert_special("行った行っ"))
+        self.assertIn("行っ", automaton.special_prefix_set)
+
+
+if __name__ == "__main__":
+    unittest.main()
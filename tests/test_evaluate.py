@@ -0,0 +1,66 @@
+""" evaluate.py 单元测试"""
+
+import io
+import unittest
+
+from src.pynonjishokei.evaluate import AccuracyEvaluator
+from src.pynonjishokei.evaluate import OTHER_RULE
+from src.pynonjishokei.evaluate import derive_rule
+from src.pynonjishokei.evaluate import evaluate_lines
+from src.pynonjishokei.main import scan_input_string
+
+
+class TestEvaluate(unittest.TestCase):
+    def test_derive_rule(self):
+        self.assertEqual("た→る", derive_rule("食べた", "食べる"))
+        self.assertEqual("かった→い", derive_rule("アツかった", "あつい"))
+        self.assertEqual("→", derive_rule("食べる", "食べる"))
+
+    def test_accuracy_evaluator(self):
+        evaluator = AccuracyEvaluator(recall_at=(1, 2))
+        self.assertTrue(evaluator.add("食べた", "食べる", ["食べる", "たべる"]))
+        self.assertTrue(evaluator.add("高かった", "高い", ["高か", "高い"]))
+        self.assertFalse(evaluator.add("行った", "行く", ["行った"]))
+        self.assertIsNone(evaluator.add_line("行った", ["行った"]))
+        report = evaluator.report()
+        self.assertEqual(3, report["total"])
+        self.assertEqual(1, report["malformed"])
+        self.assertAlmostEqual(2 / 3, report["accuracy"])
+        self.assertAlmostEqual(1 / 3, report["recall_at"][1])
+        self.assertAlmostEqual(2 / 3, report["recall_at"][2])
+        self.assertEqual(1.5, report["mean_rank"])
+        self.assertEqual({"った→く": {"errors": 1, "total": 1}}, report["rule_errors"])
+
+    def test_max_rules(self):
+        evaluator = AccuracyEvaluator(max_rules=2)
+        for _ in range(3):
+            evaluator.add("食べた", "食べる", [])
+        evaluator.add("行った", "行く", ["行く"])
+        evaluator.add("行った", "行く", ["行く"])
+        # 出现次数少的规则合并到 other 中，计数不会丢失
+        for index in range(100):
+            evaluator.add(f"{index}た", f"{index}る{index}", [])
+        self.assertLessEqual(len(evaluator.rule_total), 2 * 2 + 1)
+        self.assertEqual(105, sum(evaluator.rule_total.values()))
+        self.assertEqual(103, sum(evaluator.rule_errors.values()))
+        self.assertEqual(3, evaluator.rule_total["た→る"])
+        self.assertEqual(2, evaluator.rule_total["った→く"])
+        self.assertIn(OTHER_RULE, evaluator.report()["rule_errors"])
+
+    def test_evaluate_lines(self):
+        review_file = io.StringIO()
+        report = evaluate_lines(
+            ["食べた:食べる", "行った:行く", "食べた:存在しない"],
+            workers=1,
+            review_file=review_file,
+        )
+        self.assertEqual(3, report["total"])
+        self.assertEqual(2, report["correct"])
+        self.assertEqual(
+            f"False {','.join(scan_input_string('食べた'))} 食べた:存在しない\n",
+            review_file.getvalue(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+""" generation.py 单元测试"""
+
+import unittest
+
+from src.pynonjishokei.generation import build_surface_index
+from src.pynonjishokei.generation import get_surface_generator
+from src.pynonjishokei.generation import iter_surface_forms
+from src.pynonjishokei.generation import SurfaceGenerator
+from src.pynonjishokei.main import rule_registry
+from src.pynonjishokei.main import scan_input_string
+
+
+class TestSurfaceGenerator(unittest.TestCase):
+    def test_iter_surface_forms(self):
+        surface_forms = list(iter_surface_forms("食べる"))
+        self.assertEqual("食べる", surface_forms[0])
+        for surface_form in ("食べ", "食べた", "食べさ", "食べら"):
+            self.assertIn(surface_form, surface_forms)
+        self.assertEqual(len(surface_forms), len(set(surface_forms)))
+        self.assertIn("待っ", list(iter_surface_forms("待つ")))
+        self.assertEqual([], list(iter_surface_forms("")))
+
+    def test_special(self):
+        generator = SurfaceGenerator({"た": ["る"]}, {"いらっしゃい": ["いらっしゃる"]})
+        self.assertEqual(
+            ["いらっしゃる", "いらっしゃ", "いらっしゃた", "いらっしゃい"],
+            list(generator.iter_surface_forms("いらっしゃる")),
+        )
+        # 至少保留一个字作为词干
+        self.assertEqual(["る"], list(generator.iter_surface_forms("る")))
+
+    def test_round_trip(self):
+        # 生成的每个非辞书形都能还原为原来的辞书形
+        automaton = rule_registry.snapshot.deinflection_automaton
+        for jishokei in ("食べる", "行く", "待つ", "美しい", "来る"):
+            for surface_form in iter_surface_forms(jishokei):
+                if surface_form == jishokei:
+                    continue
+                self.assertIn(
+                    jishokei,
+                    [
+                        *automaton.convert_conjugate(surface_form),
+                        *(automaton.convert_special(surface_form) or ()),
+                    ],
+                    surface_form,
+                )
+        self.assertIn("食べる", scan_input_string("食べさせられた"))
+
+    def test_generator_cache(self):
+        snapshot = rule_registry.snapshot
+        self.assertIs(get_surface_generator(snapshot), get_surface_generator())
+
+    def test_build_surface_index(self):
+        surface_index = build_surface_index(["食べる", "行く"])
+        self.assertEqual(tuple(iter_surface_forms("行く")), surface_index["行く"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+""" instrumentation.py 单元测试"""
+
+import logging
+import unittest
+
+from src.pynonjishokei import instrumentation
+from src.pynonjishokei.main import clear_cache
+from src.pynonjishokei.main import scan_input_string
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        # 命中结果缓存时不会产生埋点事件
+        clear_cache()
+
+    def tearDown(self):
+        instrumentation.set_trace_sink(None)
+        instrumentation.enable_stats(False)
+        instrumentation.reset_stats()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrumentation.trace_enabled)
+
+    def test_trace_sink(self):
+        events = []
+        instrumentation.set_trace_sink(lambda event, fields: events.append((event, fields)))
+        self.assertTrue(instrumentation.trace_enabled)
+        scan_input_string("行った")
+        self.assertIn(("scan_prefix", {"prefix": "行"}), events)
+        self.assertIn(
+            ("scan_candidate", {"candidate": "行く", "source": "special"}), events
+        )
+        # 每个活用推导结果都记录产生它的规则
+        self.assertIn(
+            ("conjugate_candidate", {"candidate": "行る", "rule": "v1"}), events
+        )
+        self.assertIn(
+            ("conjugate_candidate", {"candidate": "行つ", "rule": "っ"}), events
+        )
+
+        instrumentation.set_trace_sink(None)
+        self.assertFalse(instrumentation.trace_enabled)
+        events.clear()
+        clear_cache()
+        scan_input_string("行った")
+        self.assertEqual([], events)
+
+    def test_logging_sink(self):
+        logger = logging.getLogger("pynonjishokei.test")
+        instrumentation.set_trace_sink(instrumentation.logging_sink(logger))
+        with self.assertLogs(logger, level=logging.DEBUG) as captured:
+            scan_input_string("行った")
+        self.assertTrue(any("scan_prefix" in line for line in captured.output))
+
+    def test_stats(self):
+        self.assertFalse(instrumentation.stats_enabled)
+        scan_input_string("行った")
+        self.assertEqual(
+            {"stages": {}, "counters": {}}, instrumentation.stats_snapshot()
+        )
+
+        instrumentation.enable_stats()
+        clear_cache()
+        scan_input_string("行った")
+        stats = instrumentation.stats_snapshot()
+        for stage in (
+            "preprocess",
+            "prefix_scan",
+            "katakana",
+            "conjugate",
+            "orthography",
+            "special",
+            "dedupe",
+        ):
+            with self.subTest(stage=stage):
+                self.assertGreater(stats["stages"][stage]["calls"], 0)
+                self.assertGreaterEqual(stats["stages"][stage]["seconds"], 0)
+        counters = stats["counters"]
+        self.assertEqual(counters["prefixes_scanned"], stats["stages"]["special"]["calls"])
+        self.assertGreaterEqual(
+            counters["orthography_probes"], counters.get("orthography_hits", 0)
+        )
+        self.assertGreater(counters["special_candidates"], 0)
+
+        # 快照是副本，命中缓存的查询只增加计数
+        scan_input_string("行った")
+        self.assertEqual(1, instrumentation.stats_snapshot()["counters"]["scan_cache_hits"])
+        self.assertNotIn("scan_cache_hits", counters)
+
+        instrumentation.reset_stats()
+        self.assertEqual(
+            {"stages": {}, "counters": {}}, instrumentation.stats_snapshot()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
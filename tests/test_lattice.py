@@ -0,0 +1,52 @@
+""" lattice.py 单元测试"""
+
+import unittest
+
+from src.pynonjishokei.lattice import SOURCE_INPUT
+from src.pynonjishokei.lattice import SOURCE_SPECIAL
+from src.pynonjishokei.lattice import Span
+from src.pynonjishokei.lattice import best_path
+from src.pynonjishokei.lattice import build_lattice
+from src.pynonjishokei.main import scan_preprocessed_string
+from src.pynonjishokei.preprocess import preprocess
+
+
+class TestLattice(unittest.TestCase):
+    def test_build_lattice(self):
+        input_text = "嘘(うそ)をつく。食べました。行った"
+        lattice = build_lattice(input_text)
+        # 片段的位置对应预处理后的文档
+        self.assertEqual(preprocess(input_text), lattice.text)
+        # 每个位置的片段与单独扫描该位置得到的结果一致
+        for start in range(len(lattice.text)):
+            with self.subTest(start=start):
+                expected_result = set(scan_preprocessed_string(lattice.text[start:]))
+                expected_result.discard(lattice.text[start:])
+                self.assertEqual(
+                    expected_result,
+                    {span.jishokei for span in lattice.spans if span.start == start},
+                )
+        self.assertIn(
+            Span(lattice.text.index("行っ"), len(lattice.text) - 1, "行く", SOURCE_SPECIAL),
+            lattice.spans,
+        )
+
+    def test_best_path(self):
+        lattice = build_lattice("今日は寿司を食べました。")
+        path = best_path(lattice)
+        # 最优路径覆盖整篇文档，且片段首尾相接
+        self.assertEqual(0, path[0].start)
+        self.assertEqual(len(lattice.text), path[-1].end)
+        for previous_span, span in zip(path, path[1:]):
+            self.assertEqual(previous_span.end, span.start)
+        self.assertIn("食べる", [span.jishokei for span in path])
+        self.assertEqual(SOURCE_INPUT, path[-1].source)
+
+    def test_empty(self):
+        lattice = build_lattice("")
+        self.assertEqual([], lattice.spans)
+        self.assertEqual([], best_path(lattice))
+
+
+if __name__ == "__main__":
+    unittest.main()
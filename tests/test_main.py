@@ -4,11 +4,19 @@
 
 import unittest
 
+from src.pynonjishokei.main import cache_info
+from src.pynonjishokei.main import clear_cache
+from src.pynonjishokei.main import configure_cache
 from src.pynonjishokei.main import convert_conjugate
 from src.pynonjishokei.main import convert_nonjishokei
 from src.pynonjishokei.main import convert_orthography
+from src.pynonjishokei.main import iter_scanned_prefixes
+from src.pynonjishokei.main import rank_scanned_prefix
 from src.pynonjishokei.main import scan_input_string
+from src.pynonjishokei.main import scan_preprocessed_string
+from src.pynonjishokei.main import scan_many
 from src.pynonjishokei.main import main
+from src.pynonjishokei.main import reload_rules
 
 
 class TestMain(unittest.TestCase):
@@ -380,6 +388,93 @@ class TestMain(unittest.TestCase):
         self.assertIn("食べる", scan_input_string("食べます。"))
         self.assertIn("食べる", scan_input_string("食べる。"))
 
+    def test_iter_scanned_prefixes(self):
+        """没有词条能延续当前前缀时应停止扫描，不必扫描整个句子"""
+        self.assertEqual(["食", "食べ"], list(iter_scanned_prefixes("食べ"))[:2])
+        prefixes = list(iter_scanned_prefixes("食べます。" + "。" * 100))
+        self.assertLess(len(prefixes), 10)
+        # 全为片假名的前缀不经词库确认就会被添加到结果中，所以需要扫描到底
+        self.assertEqual(7, len(list(iter_scanned_prefixes("コンピューター"))))
+        # special_rule.json 中的键
+        self.assertIn("きた", list(iter_scanned_prefixes("きた")))
+        self.assertEqual([], list(iter_scanned_prefixes("")))
+
+    def test_scan_many(self):
+        """批量扫描的结果应与逐个调用 scan_input_string 完全一致"""
+        input_texts = ["食べます。", "", "Hello", "行った", "食べます。", "食べた", "ｱﾂい"]
+        self.assertEqual(
+            [scan_input_string(input_text) for input_text in input_texts],
+            list(scan_many(input_texts)),
+        )
+        # 返回的结果可以被调用方修改而不影响后续结果
+        results = scan_many(["行った", "行った"])
+        next(results).clear()
+        self.assertEqual(scan_input_string("行った"), next(results))
+        # 即使缓存被清空，结果也应保持一致
+        self.assertEqual(
+            [scan_input_string(input_text) for input_text in input_texts],
+            list(scan_many(input_texts, cache_size=1)),
+        )
+
+    def test_scan_input_string_max_results(self):
+        """前 k 个结果应与完整结果的前 k 项一致"""
+        for input_text in ["コンピュータ", "アツかった", "食べさせられなかった", "行った"]:
+            clear_cache()
+            expected_result = scan_input_string(input_text)
+            for max_results in range(len(expected_result) + 2):
+                with self.subTest(input_text=input_text, max_results=max_results):
+                    clear_cache()
+                    self.assertEqual(
+                        expected_result[:max_results],
+                        scan_input_string(input_text, max_results),
+                    )
+                    # 命中缓存时同样截取前 k 项
+                    scan_input_string(input_text)
+                    self.assertEqual(
+                        expected_result[:max_results],
+                        scan_input_string(input_text, max_results),
+                    )
+        # 词库确认过的结果排在未经确认的片假名猜测之前
+        self.assertEqual(
+            ["コンピューター", "こんぴゅーた"], scan_input_string("コンピュータ", 2)
+        )
+
+    def test_scan_preprocessed_string_stops_early(self):
+        scanned_prefixes = []
+
+        def convert_prefix(scanned_input_text, rules):
+            scanned_prefixes.append(scanned_input_text)
+            return rank_scanned_prefix(scanned_input_text, rules)
+
+        self.assertEqual(
+            ["食べる"],
+            scan_preprocessed_string("食べました", convert_prefix, max_results=1),
+        )
+        # 最长的前缀已经给出足够的结果，更短的前缀不再推导
+        self.assertEqual(["食べま"], scanned_prefixes)
+
+    def test_result_cache(self):
+        clear_cache()
+        expected_result = scan_input_string("行った")
+        self.assertEqual(1, cache_info()["scan_input_string"].misses)
+        # 修改返回的结果不会影响缓存
+        scan_input_string("行った").clear()
+        self.assertEqual(expected_result, scan_input_string("行った"))
+        self.assertEqual(2, cache_info()["scan_input_string"].hits)
+
+        # 重新加载规则后缓存失效
+        reload_rules()
+        self.assertEqual(0, cache_info()["scan_input_string"].currsize)
+        self.assertEqual(expected_result, scan_input_string("行った"))
+
+        configure_cache(1)
+        try:
+            scan_input_string("食べた")
+            self.assertEqual(1, cache_info()["scan_input_string"].currsize)
+            self.assertEqual(1, cache_info()["scan_input_string"].evictions)
+        finally:
+            configure_cache(4096)
+
     def test_scan_input_string_for_special_rule(self):
         # special_rule.json 中记录的规则将在逐字扫描输入字符串的过程中反复执行
         self.assertIn("行く", scan_input_string("行っ"))
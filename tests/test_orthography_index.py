@@ -0,0 +1,95 @@
+""" orthography_index.py 单元测试"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.pynonjishokei.orthography_index import OrthographyIndex
+from src.pynonjishokei.orthography_index import build_orthography_index
+from src.pynonjishokei.orthography_index import compile_orthography_index
+from src.pynonjishokei.orthography_index import load_orthography_index
+
+rule_dict = {
+    "食べる": ["たべる", ""],
+    "気づく": ["気付く"],
+    "障がい": ["障害", "しょうがい"],
+    "あ": [""],
+}
+
+
+class TestOrthographyIndex(unittest.TestCase):
+    def test_get(self):
+        index = OrthographyIndex(compile_orthography_index(rule_dict))
+        self.assertEqual(len(rule_dict), len(index))
+        for key, value in rule_dict.items():
+            with self.subTest(key=key):
+                self.assertIn(key, index)
+                expected = tuple(word or key for word in value)
+                self.assertEqual(expected, index.get(key))
+        self.assertIsNone(index.get("食べ"))
+        self.assertIsNone(index.get(""))
+        self.assertNotIn("食べるな", index)
+
+    def test_empty_index(self):
+        index = OrthographyIndex(compile_orthography_index({}))
+        self.assertEqual(0, len(index))
+        self.assertIsNone(index.get("食べる"))
+
+    def test_build_and_load(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_path = os.path.join(temp_dir, "index.json")
+            index_path = os.path.join(temp_dir, "index.bin")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(rule_dict, f, ensure_ascii=False)
+            # 索引文件不存在时自动编译
+            index = load_orthography_index(json_path, index_path)
+            self.assertTrue(os.path.exists(index_path))
+            self.assertEqual(("気付く",), index.get("気づく"))
+
+            build_orthography_index(json_path, index_path)
+            self.assertEqual(
+                ("気付く",), OrthographyIndex.from_file(index_path).get("気づく")
+            )
+
+    def test_shared_strings(self):
+        index = OrthographyIndex(
+            compile_orthography_index({"たべる": ["食べる"], "喰べる": ["食べる"]})
+        )
+        self.assertIs(index.get("たべる")[0], index.get("喰べる")[0])
+
+    def test_rebuild_old_version(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_path = os.path.join(temp_dir, "index.json")
+            index_path = os.path.join(temp_dir, "index.bin")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(rule_dict, f, ensure_ascii=False)
+            with open(index_path, "wb") as f:
+                f.write(b"NJKI\x01\x00\x00\x00\x00\x00\x00\x00")
+            index = load_orthography_index(json_path, index_path)
+            self.assertEqual(("気付く",), index.get("気づく"))
+
+    def test_invalid_index(self):
+        with self.assertRaises(ValueError):
+            OrthographyIndex(b"\x00" * 12)
+        # 截断在偏移量表、候选词编号或字符串表中的任何位置都应被识别
+        compiled_index = compile_orthography_index(rule_dict)
+        for length in range(16, len(compiled_index)):
+            with self.subTest(length=length):
+                with self.assertRaises(ValueError):
+                    OrthographyIndex(compiled_index[:length])
+
+    def test_rebuild_truncated(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_path = os.path.join(temp_dir, "index.json")
+            index_path = os.path.join(temp_dir, "index.bin")
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(rule_dict, f, ensure_ascii=False)
+            with open(index_path, "wb") as f:
+                f.write(compile_orthography_index(rule_dict)[:20])
+            index = load_orthography_index(json_path, index_path)
+            self.assertEqual(("気付く",), index.get("気づく"))
+
+
+if __name__ == "__main__":
+    unittest.main()
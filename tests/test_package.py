@@ -0,0 +1,47 @@
+""" __init__.py 单元测试"""
+
+import subprocess
+import sys
+import types
+import unittest
+
+import src.pynonjishokei as pynonjishokei
+from src.pynonjishokei import main
+from src.pynonjishokei import preprocess
+from src.pynonjishokei import scan_for_phrase
+
+
+class TestPackage(unittest.TestCase):
+    def test_lazy_import(self):
+        # 在新的进程中检查：导入本包和 main 都不会加载规则
+        code = (
+            "import sys\n"
+            "import src.pynonjishokei as pynonjishokei\n"
+            "assert 'src.pynonjishokei.main' not in sys.modules\n"
+            "pynonjishokei.preprocess.convert_kata_to_hira('タベル')\n"
+            "assert 'src.pynonjishokei.main' not in sys.modules\n"
+            "from src.pynonjishokei.main import rule_registry\n"
+            "assert not rule_registry.loaded\n"
+            "assert pynonjishokei.scan_input_string('食べた')[0] == '食べる'\n"
+            "assert rule_registry.loaded\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_attributes(self):
+        self.assertIs(main.scan_input_string, pynonjishokei.scan_input_string)
+        self.assertIs(preprocess, pynonjishokei.preprocess)
+        self.assertEqual("たべる", pynonjishokei.convert_kata_to_hira("タベル"))
+        # 与子模块同名的函数不作为包的属性公开，包的属性始终是子模块
+        self.assertIsInstance(scan_for_phrase, types.ModuleType)
+        self.assertIs(scan_for_phrase, pynonjishokei.scan_for_phrase)
+        self.assertTrue(callable(pynonjishokei.scan_for_phrase.scan_for_phrase))
+        self.assertIs(
+            scan_for_phrase.longest_matching_scan, pynonjishokei.longest_matching_scan
+        )
+        self.assertIn("scan_input_string", dir(pynonjishokei))
+        with self.assertRaises(AttributeError):
+            pynonjishokei.unknown  # pylint: disable=W0104
+
+
+if __name__ == "__main__":
+    unittest.main()
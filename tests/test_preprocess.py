@@ -4,7 +4,10 @@ import unittest
 from textwrap import dedent
 
 from src.pynonjishokei.preprocess import (
+    convert_full_to_half_kata,
     convert_half_full_width,
+    convert_half_to_full_kata,
+    convert_hira_to_kata,
     convert_kata_to_hira,
     convert_repeated_double_daku_sign,
     convert_repeated_double_sign,
@@ -12,6 +15,7 @@ from src.pynonjishokei.preprocess import (
     convert_repeated_single_sign,
     del_ocr_error,
     del_word_ruby,
+    preprocess,
 )
 
 
@@ -48,6 +52,33 @@ class TestMain(unittest.TestCase):
         katakana = "ァアィイゥウェエォオカガキギクグケゲコゴサザシジスズセゼソゾタダチヂッツヅテデトドナニヌネノハバパヒビピフブプヘベペホボポマミムメモャヤュユョヨラリルレロヮワヰヱヲンヴヵヶ"
         self.assertEqual(hiragana, convert_kata_to_hira(katakana))
 
+    def test_convert_hira_to_kata(self):
+        """将平假名转为片假名"""
+        self.assertEqual("クマ", convert_hira_to_kata("くま"))
+        self.assertEqual("グット", convert_hira_to_kata("ぐっと"))
+        self.assertEqual("食ベル", convert_hira_to_kata("食べる"))
+        hiragana = "ぁあぃいぅうぇえぉおかがきぎくぐけげこごさざしじすずせぜそぞただちぢっつづてでとどなにぬねのはばぱひびぴふぶぷへべぺほぼぽまみむめもゃやゅゆょよらりるれろゎわゐゑをんゔゕゖ"
+        katakana = "ァアィイゥウェエォオカガキギクグケゲコゴサザシジスズセゼソゾタダチヂッツヅテデトドナニヌネノハバパヒビピフブプヘベペホボポマミムメモャヤュユョヨラリルレロヮワヰヱヲンヴヵヶ"
+        self.assertEqual(katakana, convert_hira_to_kata(hiragana))
+        self.assertEqual(hiragana, convert_kata_to_hira(convert_hira_to_kata(hiragana)))
+
+    def test_convert_half_to_full_kata(self):
+        """半角片假名转全角片假名，不改变其他字符"""
+        self.assertEqual("ガッコウ", convert_half_to_full_kata("ｶﾞｯｺｳ"))
+        self.assertEqual("パン、ヴ", convert_half_to_full_kata("ﾊﾟﾝ､ｳﾞ"))
+        self.assertEqual("ABCアツい", convert_half_to_full_kata("ABCｱﾂい"))
+        self.assertEqual("ＡＢＣ", convert_half_to_full_kata("ＡＢＣ"))
+
+    def test_convert_full_to_half_kata(self):
+        """全角片假名转半角片假名，浊音假名拆分为两个字符"""
+        self.assertEqual("ｶﾞｯｺｳ", convert_full_to_half_kata("ガッコウ"))
+        self.assertEqual("ﾊﾟﾝ､ｳﾞ", convert_full_to_half_kata("パン、ヴ"))
+        self.assertEqual("がっこう", convert_full_to_half_kata("がっこう"))
+        katakana = "ァアィイゥウェエォオカガキギクグケゲコゴサザシジスズセゼソゾタダチヂッツヅテデトドナニヌネノハバパヒビピフブプヘベペホボポマミムメモャヤュユョヨラリルレロワヲンヴ"
+        self.assertEqual(
+            katakana, convert_half_to_full_kata(convert_full_to_half_kata(katakana))
+        )
+
     def test_convert_repeated_single_sign(self):
         """单字符重复符号"""
         # https://ja.wikipedia.org/wiki/%E8%B8%8A%E3%82%8A%E5%AD%97
@@ -165,6 +196,15 @@ class TestMain(unittest.TestCase):
         self.assertEqual(full_width_text, convert_half_full_width(half_width_text))
         self.assertEqual("凭(もた)れよふ", convert_half_full_width("凭（もた）れよふ"))
 
+    def test_preprocess(self):
+        """预处理的各个步骤依次生效"""
+        self.assertEqual("食べた", preprocess(" 食べた\n"))
+        self.assertEqual("嘘をつくのよ", preprocess("嘘（うそ）をつくのよ"))
+        self.assertEqual("正正堂堂と", preprocess("正々堂々と"))
+        self.assertEqual("ABC", preprocess("ＡＢＣ"))
+        self.assertEqual("ＡＢＣ", preprocess("ＡＢＣ", need_half2full=False))
+        self.assertEqual("", preprocess(""))
+
 
 if __name__ == "__main__":
     unittest.main()
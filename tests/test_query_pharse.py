@@ -1,6 +1,12 @@
+import sqlite3
+import threading
 import unittest
 
+from src.pynonjishokei.db.query_phrase import close_connections
+from src.pynonjishokei.db.query_phrase import get_connection
+from src.pynonjishokei.db.query_phrase import invalidate_connections
 from src.pynonjishokei.db.query_phrase import query_phrase
+from src.pynonjishokei.db.query_phrase import query_phrase_words
 
 result = [("嘘を付く",)]
 
@@ -23,6 +29,75 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual([], query_phrase([["うそ"]]))
         self.assertEqual([], query_phrase([[""]]))
 
+    def test_query_phrase_words(self):
+        self.assertEqual({"うそ", "つく", "嘘", "付く"}, query_phrase_words())
+
+    def test_get_connection(self):
+        # 同一线程复用同一个连接
+        connection = get_connection()
+        self.assertIs(connection, get_connection())
+
+        # 不同线程使用各自的连接
+        thread_connections = []
+        thread = threading.Thread(target=lambda: thread_connections.append(get_connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(connection, thread_connections[0])
+
+        # 数据库以只读方式打开
+        with self.assertRaises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM kannyouku")
+
+        # 关闭后重新建立连接
+        close_connections()
+        self.assertIsNot(connection, get_connection())
+        self.assertEqual(result, query_phrase([["うそ"], ["つく"]]))
+
+    def test_invalidate_connections(self):
+        # 另一个线程的连接在失效后仍然可用，直到该线程自己重新建立连接
+        started = threading.Event()
+        invalidated = threading.Event()
+        thread_results = []
+
+        def query_in_thread():
+            connection = get_connection()
+            started.set()
+            invalidated.wait()
+            thread_results.append(connection.execute("SELECT 1").fetchone())
+            new_connection = get_connection()
+            thread_results.append(new_connection is not connection)
+            # 旧连接已经由本线程关闭
+            try:
+                connection.execute("SELECT 1")
+            except sqlite3.ProgrammingError:
+                thread_results.append("closed")
+
+        thread = threading.Thread(target=query_in_thread)
+        thread.start()
+        started.wait()
+        connection = get_connection()
+        invalidate_connections()
+        invalidated.set()
+        thread.join()
+        self.assertEqual([(1,), True, "closed"], thread_results)
+        self.assertIsNot(connection, get_connection())
+        self.assertEqual(result, query_phrase([["うそ"], ["つく"]]))
+
+    def test_dead_thread_connections(self):
+        # 已结束的线程留下的连接在其他线程建立连接时被关闭，不会随线程的替换不断累积
+        thread_connections = []
+        for _ in range(3):
+            thread = threading.Thread(
+                target=lambda: thread_connections.append(get_connection())
+            )
+            thread.start()
+            thread.join()
+        for connection in thread_connections[:-1]:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+        close_connections()
+        self.assertEqual(result, query_phrase([["うそ"], ["つく"]]))
+
 
 if __name__ == "__main__":
     unittest.main()
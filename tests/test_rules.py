@@ -0,0 +1,124 @@
+""" rules.py 单元测试"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src.pynonjishokei.main import scan_preprocessed_string
+from src.pynonjishokei.orthography_index import OrthographyIndex
+from src.pynonjishokei.orthography_index import compile_orthography_index
+from src.pynonjishokei.rules import CONJUGATE_RULE_PATH
+from src.pynonjishokei.main import convert_nonjishokei
+from src.pynonjishokei.rules import RuleRegistry
+from src.pynonjishokei.rules import merge_rule_dicts
+from src.pynonjishokei.rules import read_rule_file
+from src.pynonjishokei.rules import read_user_rule_file
+
+
+class TestRuleRegistry(unittest.TestCase):
+    def test_lazy_load(self):
+        registry = RuleRegistry()
+        self.assertFalse(registry.loaded)
+        snapshot = registry.snapshot
+        self.assertTrue(registry.loaded)
+        self.assertEqual(0, snapshot.generation)
+        self.assertIs(snapshot, registry.snapshot)
+
+    def test_reload(self):
+        registry = RuleRegistry()
+        old_snapshot = registry.snapshot
+        reloaded_snapshots = []
+        registry.add_listener(reloaded_snapshots.append)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            conjugate_rule_path = os.path.join(temp_dir, "conjugate_rule.json")
+            conjugate_rule_dict = read_rule_file(CONJUGATE_RULE_PATH)
+            conjugate_rule_dict["ちゃった"] = ["る"]
+            with open(conjugate_rule_path, "w", encoding="utf-8") as f:
+                json.dump(conjugate_rule_dict, f, ensure_ascii=False)
+            new_snapshot = registry.reload(conjugate_rule_path=conjugate_rule_path)
+
+        self.assertIs(new_snapshot, registry.snapshot)
+        self.assertEqual([new_snapshot], reloaded_snapshots)
+        self.assertEqual(old_snapshot.generation + 1, new_snapshot.generation)
+        self.assertIn("ちゃった", new_snapshot.conjugate_rule_dict)
+        # 旧快照不受重新加载的影响，正在进行的查询仍能得到一致的结果
+        self.assertNotIn("ちゃった", old_snapshot.conjugate_rule_dict)
+        self.assertIn(
+            "食べる",
+            new_snapshot.deinflection_automaton.convert_conjugate("食べちゃった"),
+        )
+        self.assertNotIn(
+            "食べる",
+            old_snapshot.deinflection_automaton.convert_conjugate("食べちゃった"),
+        )
+
+    def test_reload_compiled_index(self):
+        registry = RuleRegistry()
+        orthography_index = OrthographyIndex(
+            compile_orthography_index({"ほげる": [""]})
+        )
+        snapshot = registry.reload(orthography_index=orthography_index)
+        self.assertIs(orthography_index, snapshot.orthography_index)
+        self.assertEqual(
+            ["ほげる", "ほげた"], scan_preprocessed_string("ほげた", rules=snapshot)
+        )
+
+
+class TestUserRules(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_rule_file(self, name, content):
+        rule_path = os.path.join(self.temp_dir.name, name)
+        with open(rule_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False)
+        return rule_path
+
+    def test_merge_rule_dicts(self):
+        base_rule_dict = {"た": ["る", "つ"]}
+        self.assertEqual(
+            {"た": ["る", "つ", "う"], "ちゃった": ["る"]},
+            merge_rule_dicts(base_rule_dict, {"た": ["う", "る"]}, {"ちゃった": ["る"]}),
+        )
+        self.assertEqual({"た": ["る", "つ"]}, base_rule_dict)
+
+    def test_read_user_rule_file(self):
+        rule_path = self.write_rule_file("user.json", {"special": {"おる": ["いる"]}})
+        self.assertEqual(({}, {"おる": ["いる"]}), read_user_rule_file(rule_path))
+        for content in [[], {"orthography": {}}, {"conjugate": {"た": "る"}}]:
+            with self.subTest(content=content):
+                rule_path = self.write_rule_file("invalid.json", content)
+                with self.assertRaises(ValueError):
+                    read_user_rule_file(rule_path)
+
+    def test_user_rules(self):
+        registry = RuleRegistry()
+        self.assertEqual([], convert_nonjishokei("食べちゃった", rules=registry.snapshot))
+        snapshot = registry.reload(
+            user_rule_paths=[
+                self.write_rule_file("slang.json", {"conjugate": {"ちゃった": ["る"]}}),
+                self.write_rule_file("dialect.json", {"special": {"おる": ["いる"]}}),
+            ]
+        )
+        # 多个字的词尾规则同样参与逐字扫描
+        self.assertIn("食べる", convert_nonjishokei("食べちゃった", rules=snapshot))
+        self.assertEqual(
+            "食べる", scan_preprocessed_string("食べちゃった", rules=snapshot)[0]
+        )
+        self.assertIn("いる", scan_preprocessed_string("おる", rules=snapshot))
+
+        # 加载失败时继续使用原来的规则
+        with self.assertRaises(ValueError):
+            registry.reload(
+                user_rule_paths=[self.write_rule_file("invalid.json", {"other": {}})]
+            )
+        self.assertIs(snapshot, registry.snapshot)
+        self.assertEqual(2, len(registry.user_rule_paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
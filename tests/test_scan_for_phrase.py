@@ -1,8 +1,17 @@
 import unittest
 
+from src.pynonjishokei import instrumentation
+
 from src.pynonjishokei.scan_for_phrase import scan_for_phrase
 from src.pynonjishokei.scan_for_phrase import find_phrase
+from src.pynonjishokei.scan_for_phrase import get_phrase_words_set
 from src.pynonjishokei.scan_for_phrase import longest_matching_scan
+from src.pynonjishokei.scan_for_phrase import order_candidates
+from src.pynonjishokei.main import RankedCandidates
+from src.pynonjishokei.main import iter_scanned_prefixes
+from src.pynonjishokei.main import rank_scanned_prefix
+from src.pynonjishokei.main import rule_registry
+from src.pynonjishokei.main import scan_preprocessed_string
 
 
 def get_nested_list_str_items(input_list: list[list[str]]) -> set[str]:
@@ -123,6 +132,74 @@ class TestMain(unittest.TestCase):
 
         self.do_longest_matching_scan_test(pre_kanji_test_cases)
 
+    def test_longest_matching_scan_is_linear(self):
+        """每个起始位置只推导一次，推导的前缀数量应与句子长度近似成正比"""
+        scanned_windows = []
+        instrumentation.set_trace_sink(
+            lambda event, fields: scanned_windows.append(fields)
+            if event == "phrase_scan_window"
+            else None
+        )
+        try:
+            result = longest_matching_scan("うそ" + "。" * 200 + "をつく")
+        finally:
+            instrumentation.set_trace_sink(None)
+        self.assertCountEqual(
+            get_nested_list_str_items([["うそ"], ["つく", "付く"]]),
+            get_nested_list_str_items(result),
+        )
+        self.assertLess(len(scanned_windows), 205 * 5)
+
+    def test_longest_matching_scan_katakana_is_linear(self):
+        """全为片假名的前缀不会被词库剪枝，扫描长度也应受单词最大长度限制"""
+        window_counts = []
+        for repeat in (20, 40):
+            scanned_windows = []
+            instrumentation.set_trace_sink(
+                lambda event, fields, scanned_windows=scanned_windows: (
+                    scanned_windows.append(fields)
+                    if event == "phrase_scan_window"
+                    else None
+                )
+            )
+            try:
+                longest_matching_scan("コンピューター" * repeat)
+            finally:
+                instrumentation.set_trace_sink(None)
+            window_counts.append(len(scanned_windows))
+        # 句子长度翻倍时，推导的前缀数量也只应约翻倍，而不是变为 4 倍
+        self.assertLess(window_counts[1], window_counts[0] * 2.5)
+
+    def test_order_candidates(self):
+        # 所有确认结果排在猜测之前，同一前缀中后推导出的结果在前
+        self.assertEqual(
+            ["食べる", "食べ", "たべ", "た"],
+            order_candidates(
+                [
+                    RankedCandidates(("食べ", "食べる"), ("たべ",)),
+                    RankedCandidates((), ("た",)),
+                ]
+            ),
+        )
+        # 与 scan_input_string 的顺序一致
+        rules = rule_registry.snapshot
+        for input_text in ("アツイ", "タベた"):
+            with self.subTest(input_text=input_text):
+                ranked_candidates_list = [
+                    rank_scanned_prefix(scanned_input_text, rules)
+                    for scanned_input_text in iter_scanned_prefixes(input_text, rules)
+                ]
+                self.assertEqual(
+                    scan_preprocessed_string(input_text, rules=rules)[:-1],
+                    order_candidates(reversed(ranked_candidates_list)),
+                )
+
+    def test_get_phrase_words_set(self):
+        phrase_words_set = get_phrase_words_set()
+        self.assertTrue({"うそ", "つく", "嘘", "付く"} <= phrase_words_set)
+        # 数据库文件未变化时复用同一个集合
+        self.assertIs(phrase_words_set, get_phrase_words_set())
+
     def test_find_phrase(self):
         phrase_result = [("嘘を付く",)]
         phrase_test_cases = [
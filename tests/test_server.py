@@ -0,0 +1,192 @@
+""" server.py 单元测试"""
+
+import asyncio
+import json
+import unittest
+
+from src.pynonjishokei.__main__ import build_parser
+from src.pynonjishokei.main import scan_input_string
+from src.pynonjishokei.server import LookupServer
+
+
+async def request(port, method, path, payload=None, raw_body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        body = raw_body if raw_body is not None else b""
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        response = await reader.read()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(response_body)
+
+
+async def raw_request(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(data)
+        response = await reader.read()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(response_body)
+
+
+class TestLookupServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.lookup_server = LookupServer(workers=2, max_pending=4)
+        server = await self.lookup_server.start(port=0)
+        self.port = server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        await self.lookup_server.close()
+
+    async def test_health(self):
+        status, payload = await request(self.port, "GET", "/health")
+        self.assertEqual(200, status)
+        self.assertEqual("ok", payload["status"])
+        self.assertEqual(0, payload["pending"])
+
+    async def test_scan(self):
+        status, payload = await request(self.port, "POST", "/scan", {"text": "行った"})
+        self.assertEqual(200, status)
+        self.assertEqual(scan_input_string("行った"), payload["result"])
+
+        status, payload = await request(
+            self.port, "POST", "/scan", {"texts": ["食べた", "行った"], "max_results": 1}
+        )
+        self.assertEqual(200, status)
+        self.assertEqual([["食べる"], ["行く"]], payload["results"])
+
+    async def test_reload(self):
+        _, payload = await request(self.port, "GET", "/health")
+        generation = payload["generation"]
+        status, payload = await request(self.port, "POST", "/reload")
+        self.assertEqual(200, status)
+        self.assertEqual(generation + 1, payload["generation"])
+
+    async def test_phrase(self):
+        status, payload = await request(
+            self.port, "POST", "/phrase", {"text": "嘘をつくのよ"}
+        )
+        self.assertEqual(200, status)
+        self.assertEqual([["嘘を付く"]], payload["result"])
+
+    async def test_errors(self):
+        status, _ = await request(self.port, "GET", "/unknown")
+        self.assertEqual(404, status)
+        status, _ = await request(self.port, "GET", "/scan")
+        self.assertEqual(405, status)
+        status, _ = await request(self.port, "POST", "/scan", raw_body=b"{")
+        self.assertEqual(400, status)
+        status, _ = await request(self.port, "POST", "/scan", {"texts": "行った"})
+        self.assertEqual(400, status)
+        status, _ = await request(
+            self.port, "POST", "/scan", {"text": "行った", "max_results": -1}
+        )
+        self.assertEqual(400, status)
+
+    async def test_malformed_requests(self):
+        # 不合法的请求也要返回响应，而不是直接断开连接
+        status, _ = await raw_request(
+            self.port,
+            b"POST /scan HTTP/1.1\r\nHost: localhost\r\nContent-Length: -1\r\n\r\n",
+        )
+        self.assertEqual(400, status)
+        # 超过 StreamReader 默认 64KB 限制的头部
+        status, _ = await raw_request(
+            self.port,
+            b"GET /health HTTP/1.1\r\nX-Long: " + b"a" * ((1 << 16) + 100) + b"\r\n\r\n",
+        )
+        self.assertEqual(400, status)
+
+    async def test_lookup_error(self):
+        def failing_lookup(texts, max_results):
+            raise RuntimeError("lookup failed")
+
+        self.lookup_server._routes["/scan"] = failing_lookup  # pylint: disable=W0212
+        with self.assertLogs("src.pynonjishokei.server", level="ERROR"):
+            status, payload = await request(
+                self.port, "POST", "/scan", {"text": "行った"}
+            )
+        self.assertEqual(500, status)
+        self.assertIn("error", payload)
+        self.assertEqual(0, self.lookup_server.pending)
+
+    async def test_keep_alive(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            for _ in range(2):
+                writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                self.assertIn(b"200 OK", await reader.readline())
+                headers = {}
+                while (line := await reader.readline()) != b"\r\n":
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.lower()] = value.strip()
+                await reader.readexactly(int(headers["content-length"]))
+                self.assertEqual("keep-alive", headers["connection"])
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_head(self):
+        # HEAD 的响应没有响应体，同一连接上的下一个响应不受影响
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            writer.write(
+                b"HEAD /health HTTP/1.1\r\nHost: localhost\r\n\r\n"
+                b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n"
+            )
+            self.assertIn(b"200 OK", await reader.readline())
+            while await reader.readline() != b"\r\n":
+                pass
+            self.assertEqual(b"HTTP/1.1 200 OK\r\n", await reader.readline())
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_backpressure(self):
+        self.lookup_server.pending = self.lookup_server.max_pending
+        status, _ = await request(self.port, "POST", "/scan", {"text": "行った"})
+        self.assertEqual(503, status)
+        # 健康检查不受背压影响
+        status, _ = await request(self.port, "GET", "/health")
+        self.assertEqual(200, status)
+        # 批量查询中的每个字符串都计为一次查询
+        self.lookup_server.pending = self.lookup_server.max_pending - 1
+        status, _ = await request(
+            self.port, "POST", "/scan", {"texts": ["食べた", "行った"]}
+        )
+        self.assertEqual(503, status)
+        self.lookup_server.pending = 0
+        status, _ = await request(
+            self.port, "POST", "/scan", {"texts": ["行った"] * 4}
+        )
+        self.assertEqual(200, status)
+        status, _ = await request(
+            self.port, "POST", "/scan", {"texts": ["行った"] * 5}
+        )
+        self.assertEqual(413, status)
+        self.assertEqual(0, self.lookup_server.pending)
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_build_parser(self):
+        args = build_parser().parse_args(["serve", "--port", "0", "--workers", "1"])
+        self.assertEqual("serve", args.command)
+        self.assertEqual(0, args.port)
+        self.assertEqual(1, args.workers)
+
+
+if __name__ == "__main__":
+    unittest.main()